@@ -36,51 +36,60 @@ shortened.
 are still lasers to which the answer is yes, repeat the whole process from step 1. If not, this is the end of
 evaluation, and all remaining unstable lasers will remain half-formed.
 
+5. Blocks hit by lasers update their states (redirectors/splitters/outputs), which decides which of them emit lasers
+in step 0 of the next cycle.
+
 How everything is stored:
-1. There exists a 2D array called 'world'. The world depends on the blocks placed, just like in the other version, and
-is 2 wider on all sides of the smallest rectangle containing all blocks. E.g. if there is only a single block, the world
-is a 5x5 with the block in the center. It is rendered once when first running the solution for blocks, then rendered
-every step for lasers.
-2. Where a block is placed, a "b" is placed at the coordinates of the block. The edges of the world are also lined with
-"b" in order to simulate "infinity blocks".
-3. Add "sw", "sa", "ss" and/or "sd" for blocks which emit lasers if they are active in a certain step (generators are
-always on, input which is set to true is always on (and vice versa), and redirectors/splitters are conditionally on).
-4. Add "0w", "0a", "0s", "0d" for lasers that are going a certain direction and unstable. Change 0 to 1 when stable,
-and 1 to 2 when directly above a block/perpendicular laser (see above for laser rules). They do not exist on their own
-source blocks.
+1. laser_list holds every laser by (source coordinates, facing). A laser knows how far it can go (laser_extent()), how
+far it is drawn (reach), and how far its potential path goes (limit, shortened when it collides).
+2. laser_columns and laser_rows hold the vertical and horizontal lasers by line, the lines sorted as in step 1, so that
+a laser being drawn finds the first perpendicular potential path in its way with a bisect instead of walking its tiles.
+3. Steps 1 to 4 are a worklist (laser_queue) rather than repeated passes: a laser is queued when it is added, and
+again only when something it depends on changes (a potential path it was waiting on is shortened, or a collision it
+ended in goes away). Each laser keeps the half-formed lasers waiting on its potential path.
+4. Each block keeps the lasers hitting it, and only blocks whose lasers changed are updated in step 5, and only those
+whose firing changed have their lasers added/removed in step 0. A cycle therefore costs as much as what changed in it.
 """
+from collections import deque
 from os import mkdir, path, listdir
 from pickle import dump, load
-from idealaser_globals import facing_dict, opposite_face_dict, cost_dict
-try:
-    mkdir('IDEALaser Saves')
-except FileExistsError:
-    pass
-try:
-    mkdir('IDEALaser Saves/Blocktime Saves')
-except FileExistsError:
-    pass
-block_coordinates = {}
-block_x = {}  # TODO use this and block_y
-block_y = {}
-laser_list = []
-laser_coordinates = {}
+from idealaser_globals import facing_dict, opposite_face_dict, cost_dict, facing_offset_dict, BlockDict, \
+    LaserIndex
+block_coordinates = BlockDict()  # its columns and rows are the sorted x-column and y-row lists described above
+laser_list = {}  # (source coordinates, facing): BLaser
+laser_columns = LaserIndex()  # vertical lasers by x
+laser_rows = LaserIndex()  # horizontal lasers by y
+laser_queue = deque()
+changed_blocks = {}  # coordinates: None, for blocks whose lasers changed this cycle (step 5)
+firing_blocks = {}  # coordinates: None, for blocks whose firing may have changed (step 0)
 cycle_count = 0
-world = None
+warm = False  # 'warm' command: keep the simulation between runs, and apply edits to it (see Simulation.edit())
+warm_simulation = None
+save_folder = path.join('IDEALaser Saves', 'Blocktime Saves')
 
 
 class BBlock:
     def __init__(self, x, y):
         self.coordinates = x, y
+        self.lasers = {}  # lasers hitting this block: None
         block_coordinates[self.coordinates] = self
     
-    def prestep(self):
-        pass
+    def __getstate__(self):  # saves leave the lasers behind, as they only hold for the simulation they were drawn in
+        state = self.__dict__.copy()
+        state.pop('lasers', None)
+        return state
     
-    def step(self):
-        pass
+    def __setstate__(self, state):  # loaded blocks start with no lasers, as after reset() (older saves included)
+        self.__dict__.update(state)
+        self.reset()
+    
+    def firing(self):  # facings of the lasers the block emits this cycle
+        return ()
     
-    def poststep(self):
+    def reset(self):
+        self.lasers = {}
+    
+    def update(self):  # step 5, after the lasers hitting the block changed
         pass
 
 
@@ -92,6 +101,9 @@ class BGenerator(BBlock):
     
     def __repr__(self):
         return f'Generator{*self.coordinates, self.facing}'
+    
+    def firing(self):
+        return self.facing,
 
 
 class BInput(BBlock):
@@ -106,6 +118,9 @@ class BInput(BBlock):
     
     def __repr__(self):
         return f'Input{*self.coordinates, self.facing, self.state}'
+    
+    def firing(self):
+        return (self.facing,) if self.state else ()
 
 
 class BRedirector(BBlock):
@@ -117,16 +132,48 @@ class BRedirector(BBlock):
     
     def __repr__(self):
         return f'Redirector{*self.coordinates, self.facing}'
+    
+    def firing(self):
+        return (self.facing,) if self.state else ()
+    
+    def reset(self):
+        super().reset()
+        self.state = False
+    
+    def update(self):  # activated by any laser but those firing at its firing direction
+        self.state = any(laser.facing != opposite_face_dict[self.facing] for laser in self.lasers)
 
 
 class BSplitter(BBlock):
     def __init__(self, x, y):
         super().__init__(x, y)
         self.state = False
+        self.faces = dict.fromkeys('wasd', 'open')
         self.cost = cost_dict['p']
     
     def __repr__(self):
         return f'Splitter{self.coordinates}'
+    
+    def firing(self):
+        return tuple(side for side, mode in self.faces.items() if mode == 'closed')
+    
+    def reset(self):
+        super().reset()
+        self.state = False
+        self.faces = dict.fromkeys('wasd', 'open')
+    
+    def update(self):  # face modes, see the top of this file
+        sides = {opposite_face_dict[laser.facing] for laser in self.lasers}
+        if all(mode == 'open' for mode in self.faces.values()):
+            if sides:
+                self.faces = {side: 'connected' if side in sides else 'closed' for side in self.faces}
+        else:
+            for side, mode in self.faces.items():
+                if mode == 'connected' and side not in sides:
+                    self.faces[side] = 'closed'
+            if all(mode == 'closed' for mode in self.faces.values()):
+                self.faces = dict.fromkeys('wasd', 'open')
+        self.state = 'connected' in self.faces.values()
 
 
 class BOutput(BBlock):
@@ -137,6 +184,13 @@ class BOutput(BBlock):
     
     def __repr__(self):
         return f'Output{self.coordinates}'
+    
+    def reset(self):
+        super().reset()
+        self.state = False
+    
+    def update(self):
+        self.state = bool(self.lasers)
 
 
 class BBlocker(BBlock):
@@ -157,11 +211,134 @@ class BBridge(BBlock):
         return f'Bridge{self.coordinates}'
 
 
+class BLaser:
+    """
+    Laser from the block at source towards facing. Tiles on its path are numbered by distance from the source: it can
+    go up to length (where laser_extent() stops it, hitting target unless that is None), is drawn up to reach, and its
+    potential path covers the tiles up to limit (less than length after it collided with another laser).
+    """
+    def __init__(self, source, facing):
+        self.source = source
+        self.facing = facing
+        self.offset = facing_offset_dict[facing]
+        self.vertical = facing in ('w', 's')
+        end, self.target = laser_extent(source, facing)
+        self.length = abs(end[0] - source[0]) + abs(end[1] - source[1])
+        self.reach = 0
+        self.limit = 0
+        self.waiting_on = ()  # while half-formed: the lasers whose potential path stopped it at reach
+        self.waiters = {}  # half-formed lasers stopped by this laser's potential path: None
+        if self.vertical:
+            laser_columns.add(source[0], self)
+        else:
+            laser_rows.add(source[1], self)
+        self.uncut()
+    
+    def __repr__(self):
+        return f'Laser{*self.source, self.facing, self.reach}'
+    
+    def tile(self, distance):
+        return self.source[0] + self.offset[0] * distance, self.source[1] + self.offset[1] * distance
+    
+    def distance(self, tile):
+        return (tile[0] - self.source[0]) * self.offset[0] + (tile[1] - self.source[1]) * self.offset[1]
+    
+    def crossing(self, tile):  # perpendicular lasers whose potential path covers tile
+        if self.vertical:
+            lasers = laser_rows.lines.get(tile[1], ())
+        else:
+            lasers = laser_columns.lines.get(tile[0], ())
+        return [laser for laser in lasers if 0 < laser.distance(tile) <= laser.limit]
+    
+    def first_crossing(self, start):
+        # (distance, crossing()) of the nearest empty tile from start covered by perpendicular potential paths, or
+        # (None, []) if there is none up to length; only the lines holding perpendicular lasers are looked at
+        x, y = self.source
+        if self.vertical:
+            index, along, sign = laser_rows, y, self.offset[1]
+        else:
+            index, along, sign = laser_columns, x, self.offset[0]
+        ends = along + sign * start, along + sign * self.length
+        for line in index.between(min(ends), max(ends), sign < 0):
+            tile = (x, line) if self.vertical else (line, y)
+            if tile not in block_coordinates:  # lasers pass bridges without colliding
+                lasers = self.crossing(tile)
+                if lasers:
+                    return self.distance(tile), lasers
+        return None, []
+    
+    def uncut(self):  # restore the potential path up to length, and queue the laser to be drawn
+        self.limit = self.length
+        laser_queue.append(self)
+    
+    def stop_waiting(self):
+        for laser in self.waiting_on:
+            laser.waiters.pop(self, None)
+        self.waiting_on = ()
+    
+    def advance(self):
+        # Steps 1 to 3 for this laser: draw it on until it hits its target, infinity or another laser's potential path
+        if self.waiting_on:
+            self.stop_waiting()
+            start = self.reach
+        elif self.reach < self.limit:
+            start = self.reach + 1
+        else:
+            return  # stable
+        distance, crossing = self.first_crossing(start)
+        if distance is None:
+            self.reach = self.length
+            if self.target is not None:
+                self.target.lasers[self] = None
+                changed_blocks[self.target.coordinates] = None
+            return
+        self.reach = distance
+        tile = self.tile(distance)
+        met = [laser for laser in crossing if laser.reach >= laser.distance(tile)]
+        if not met:  # the other lasers have not got here yet: half-formed until they do or are shortened
+            self.waiting_on = crossing
+            for laser in crossing:
+                laser.waiters[self] = None
+            return
+        # collision: every laser here stops, including stable ones drawn past it, which are shortened
+        self.cut(distance)
+        for laser in met:
+            laser.cut(laser.distance(tile))
+    
+    def cut(self, distance):
+        """
+        Stops the laser at distance (0 for removing it), shortening its potential path: lasers waiting on the part
+        taken away are queued again, and so are lasers whose collision with it is undone, which go on from there.
+        """
+        self.stop_waiting()
+        if self.reach == self.length and self.target is not None:
+            del self.target.lasers[self]
+            changed_blocks[self.target.coordinates] = None
+        if self.reach > distance and self.tile(self.reach) not in block_coordinates:
+            tile = self.tile(self.reach)
+            for laser in self.crossing(tile):
+                if laser.reach == laser.limit == laser.distance(tile):
+                    laser.reach -= 1  # so that advance() checks the tile of the collision again
+                    laser.uncut()
+        self.reach = min(self.reach, distance)
+        self.limit = distance
+        for laser in self.waiters:
+            if self.distance(laser.tile(laser.reach)) > distance:
+                laser_queue.append(laser)
+    
+    def remove(self):
+        self.cut(0)
+        if self.vertical:
+            laser_columns.remove(self.source[0], self)
+        else:
+            laser_rows.remove(self.source[1], self)
+        del laser_list[self.source, self.facing]
+
+
 def main_menu():
     global block_coordinates
-    global block_x
-    global block_y
-    global laser_coordinates
+    global warm
+    global warm_simulation
     while True:
         try:
             user_input = input('''\n'run': run solution (does not begin stepping, just displays initial state)
@@ -207,6 +384,12 @@ Enter a block ID with required arguments to add it to solution (see help1), or e
                         BOutput(*user_coordinates)
                     else:
                         print("Unrecognised command.")
+                if warm_simulation is not None:
+                    if block_coordinates:
+                        warm_simulation.edit(user_coordinates)
+                    else:
+                        warm_simulation.reset()
+                        warm_simulation = None
             except IndexError:
                 # Commands not concerning individual blocks
                 if user_input[0] == 'run':
@@ -216,9 +399,19 @@ Enter a block ID with required arguments to add it to solution (see help1), or e
                         print("Must put down at least 1 block before running.")
                 elif user_input[0] == 'clear':
                     block_coordinates.clear()
+                    if warm_simulation is not None:
+                        warm_simulation.reset()
+                        warm_simulation = None
+                elif user_input[0] == 'warm':
+                    warm = not warm
+                    if not warm and warm_simulation is not None:
+                        warm_simulation.reset()
+                        warm_simulation = None
+                    print(f"Warm mode {'on' if warm else 'off'}.")
                 elif user_input[0] == 'show_block':
                     print(block_coordinates)
                 elif user_input[0] == 'save':
+                    make_folders()
                     save_name = input("Enter file name (enter nothing to escape): ").strip()
                     if save_name != '':
                         for char in save_name:
@@ -227,7 +420,7 @@ Enter a block ID with required arguments to add it to solution (see help1), or e
                                 break
                         else:
                             flag = False
-                            if path.exists(file_path := f'IDEALaser Saves\\Blocktime Saves\\{save_name}.pickle'):
+                            if path.exists(file_path := path.join(save_folder, f'{save_name}.pickle')):
                                 if input("File already exists. Overwrite? (y: yes, anything: back): ") == 'y':
                                     flag = True
                             else:
@@ -236,15 +429,19 @@ Enter a block ID with required arguments to add it to solution (see help1), or e
                                 with open(file_path, 'wb') as f:
                                     dump(block_coordinates, f)
                 elif user_input[0] == 'load':
-                    load_list = listdir('IDEALaser Saves\\Blocktime Saves')
+                    make_folders()
+                    load_list = listdir(save_folder)
                     print()
                     for file in load_list:
                         print(file)
                     print()
                     filename = input("Enter file name (without .pickle), or an invalid name to escape: ") + '.pickle'
                     if filename in load_list:
-                        with open(f'IDEALaser Saves\\Blocktime Saves\\{filename}', 'rb') as f:
-                            block_coordinates = load(f)
+                        if warm_simulation is not None:
+                            warm_simulation.reset()
+                            warm_simulation = None
+                        with open(path.join(save_folder, filename), 'rb') as f:
+                            block_coordinates = BlockDict(load(f))
                 elif user_input[0] == 'q':
                     return 'q'
                 elif user_input[0] == 'help1':
@@ -264,6 +461,8 @@ Other Commands:
 'show_block': Show block list
 'save': Save current setup (only saves blocks, does not save lasers)
 'load': Load block setup from a save (unsaved setups will be lost)
+'warm': Toggle warm mode: lasers are kept when going back to the main menu, and edits only redraw the lasers they
+    affect instead of clearing the lasers
 'q': Quit (usable when running solution) (unsaved setups will be lost)''')
                 else:
                     print("Unrecognised command.")
@@ -271,11 +470,25 @@ Other Commands:
             print("\nPlease enter valid values.")
 
 
-def edge():
-    global block_coordinates
-    temp_block_x = []
+def make_folders():
+    try:
+        mkdir('IDEALaser Saves')
+    except FileExistsError:
+        pass
+    try:
+        mkdir(save_folder)
+    except FileExistsError:
+        pass
+
+
+def edge(blocks=None):  # blocks defaults to block_coordinates
+    if blocks is None:
+        blocks = block_coordinates
+    if type(blocks) == BlockDict:
+        return blocks.edge()
+    temp_block_x = []  # plain dicts have no column/row lists, so every block is scanned
     temp_block_y = []
-    for block in block_coordinates.keys():
+    for block in blocks.keys():
         temp_block_x.append(block[0])
         temp_block_y.append(block[1])
     max_x = max(temp_block_x) + 1
@@ -285,43 +498,285 @@ def edge():
     return max_x, min_x, max_y, min_y
 
 
-def laser_eval():
-    global world
-    if world is None:
-        max_x, min_x, max_y, min_y = edge()
-        world = [[[] for _ in range(max_y - min_y + 3)] for _ in range(max_x - min_x + 3)]
-        for i, col in enumerate(world):
-            if i == 0 or i == len(world) - 1:
-                for cell in col:
-                    cell.append('b')
-            else:
-                col[0].append('b')
-                col[-1].append('b')
-        for key in block_coordinates:
-            # world[key]
-            pass
-        print(world)  # TODO del
-    for block in block_coordinates.values():
-        if type(block) == BGenerator:  # TODO include other types later
-            pass
+def laser_extent(coordinates, facing):
+    """
+    Where a laser leaving coordinates towards facing stops, as (end coordinates, block hit). Lasers pass through
+    bridges; one hitting no block goes to infinity, and ends at the edge() of the board with None as the block hit.
+    Each block looked up is a bisect of a sorted column or row of block_coordinates, so this is O(log n) per block.
+    """
+    hit = block_coordinates.next_block(coordinates, facing)
+    while hit is not None and type(block_coordinates[hit]) == BBridge:
+        hit = block_coordinates.next_block(hit, facing)
+    if hit is not None:
+        return hit, block_coordinates[hit]
+    max_x, min_x, max_y, min_y = edge()
+    x, y = coordinates
+    return {'w': (x, max_y), 'a': (min_x, y), 's': (x, min_y), 'd': (max_x, y)}[facing], None
 
 
-def tile_print():  # TODO
-    pass
-
-
-def run_solution():  # TODO
-    laser_eval()
-    pass
+def laser_eval():
+    """
+    Steps 0 to 4: adds and removes the lasers of the blocks whose firing changed, then draws queued lasers until none
+    can go any further. Lasers still waiting at the end remain half-formed.
+    """
+    for coordinates in firing_blocks:
+        firing = block_coordinates[coordinates].firing()
+        for facing in ('w', 'a', 's', 'd'):
+            laser = laser_list.get((coordinates, facing))
+            if laser is None and facing in firing:
+                laser_list[coordinates, facing] = BLaser(coordinates, facing)
+            elif laser is not None and facing not in firing:
+                laser.remove()
+    firing_blocks.clear()
+    while laser_queue:
+        laser = laser_queue.popleft()
+        if laser_list.get((laser.source, laser.facing)) is laser:  # not removed since it was queued
+            laser.advance()
+
+
+def block_eval():
+    # Step 5: update the blocks whose lasers changed, the lasers of those whose firing changed are changed next cycle
+    for coordinates in changed_blocks:
+        block = block_coordinates.get(coordinates)
+        if block is None:  # deleted by Simulation.edit()
+            continue
+        firing = block.firing()
+        block.update()
+        if block.firing() != firing:
+            firing_blocks[coordinates] = None
+    changed_blocks.clear()
+
+
+class Simulation:
+    """
+    Runs the solution in block_coordinates one blocktime cycle per step(), without prompts or printing. Unlike
+    idealaser_s.py's, which steps a World, it keeps the lasers in the globals of this module, so only one simulation
+    can run at a time.
+    """
+    def __init__(self):
+        self.reset()
+    
+    def __repr__(self):
+        return f'{type(self).__name__}(cycle={cycle_count}, lasers={len(laser_list)})'
+    
+    @property
+    def cycle(self):
+        return cycle_count
+    
+    def outputs(self):
+        return output_states()
+    
+    def lasers(self):  # {(source, facing, reach)}, reach being how far the laser is drawn
+        return {(laser.source, laser.facing, laser.reach) for laser in laser_list.values()}
+    
+    def edit(self, coordinates):
+        """
+        Updates the lasers after the block at coordinates was added, deleted, replaced or toggled, instead of a reset.
+        Only the lasers of that block, those whose path goes through its tile, and (if the edit moved the edge of the
+        board) those going to infinity are drawn again in the next step; every other laser and block state is kept.
+        """
+        x, y = coordinates
+        redraw = []
+        for facing in ('w', 'a', 's', 'd'):
+            if (coordinates, facing) in laser_list:
+                redraw.append(laser_list[coordinates, facing])
+        for laser in list(laser_columns.lines.get(x, ())) + list(laser_rows.lines.get(y, ())):
+            if 0 < laser.distance(coordinates) <= laser.length:
+                redraw.append(laser)
+        edges = edge() if block_coordinates else None
+        if edges != self.edges:
+            redraw.extend(laser for laser in laser_list.values() if laser.target is None)
+            self.edges = edges
+        for laser in dict.fromkeys(redraw):
+            laser.remove()
+            source = block_coordinates.get(laser.source)
+            if source is not None and laser.source != coordinates and laser.facing in source.firing():
+                laser_list[laser.source, laser.facing] = BLaser(laser.source, laser.facing)
+        if coordinates in block_coordinates:
+            firing_blocks[coordinates] = None  # its lasers are added in step 0
+        else:
+            firing_blocks.pop(coordinates, None)
+    
+    def settled(self):  # True if no block's firing changed last cycle, so that further cycles change nothing
+        return not firing_blocks
+    
+    def step(self):
+        global cycle_count
+        laser_eval()
+        block_eval()
+        cycle_count += 1
+    
+    def run(self, cycles):
+        for _ in range(cycles):
+            self.step()
+        return self.outputs()
+    
+    def run_until(self, predicate, max_cycles=None):
+        # predicate is called with this simulation before every step; returns the cycle it became true, or None if
+        # max_cycles steps were made without it becoming true (as in idealaser_s.py)
+        steps = 0
+        while not predicate(self):
+            if max_cycles is not None and steps >= max_cycles:
+                return None
+            self.step()
+            steps += 1
+        return cycle_count
+    
+    def reset(self):
+        global cycle_count
+        laser_list.clear()
+        laser_columns.clear()
+        laser_rows.clear()
+        laser_queue.clear()
+        changed_blocks.clear()
+        firing_blocks.clear()
+        for coordinates, block in block_coordinates.items():
+            block.reset()
+            firing_blocks[coordinates] = None
+        self.edges = edge() if block_coordinates else None
+        cycle_count = 0
+
+
+def output_states():
+    return {k: block.state for k, block in block_coordinates.items() if type(block) == BOutput}
+
+
+def tile_print():
+    cost_sum = 0
+    for block in block_coordinates.values():
+        cost_sum += block.cost
+    print(f"Cost: {cost_sum}")
+    print(f"Cycles: {cycle_count}")
+    output_dict = output_states()
+    max_x, min_x, max_y, min_y = edge()
+    area_int = (max_x - min_x - 1) * (max_y - min_y - 1)
+    print(f"Area: {area_int}")
+    if output_dict:
+        print(f"Outputs: ", end="")
+        for k, v in output_dict.items():
+            print(f"{k}: {str(v)[0].lower()}; ", end="")
+        print()
+    drawn = {}  # tile: facings of the lasers drawn over it
+    for laser in laser_list.values():
+        for distance in range(1, laser.reach + 1):
+            tile = laser.tile(distance)
+            if distance < laser.length or laser.target is None:
+                drawn.setdefault(tile, []).append(laser.facing)
+    for row in range(max_y + 1, min_y - 1, -1):
+        for col in range(min_x - 1, max_x + 1):
+            if row == max_y + 1:
+                if col != min_x - 1:
+                    if -1 < col < 10:  # 1-digit column numbers
+                        print(f"{col} ", end='')
+                    elif col > -10 or col < 100:  # 2-digit column numbers
+                        print(f"{col}", end='')
+                    else:  # 3-digit column numbers
+                        print(col, end='')
+                else:
+                    print("  ", end='')
+            elif col == min_x - 1:
+                if -1 < row < 10:  # 1-digit row numbers
+                    print(f"{row} ", end='')
+                elif row > -10 or row < 100:  # 3-digit row numbers
+                    print(f"{row}", end='')
+                else:  # 3-digit row numbers
+                    print(row, end='')
+            elif (col, row) in block_coordinates:
+                block = block_coordinates[(col, row)]
+                block_type = type(block)
+                if block_type == BGenerator:
+                    print(f"G{facing_dict[block.facing]}", end='')
+                elif block_type == BInput:
+                    if block.state:
+                        print(f"I{facing_dict[block.facing]}", end='')
+                    else:
+                        print("If", end='')
+                elif block_type in (BRedirector, BSplitter):
+                    letter = block.facing.upper() if block_type == BRedirector else 'P'
+                    print(f"{letter}{str(block.state)[0].lower()}", end='')
+                elif block_type in (BOutput, BBlocker):
+                    letter = 'O' if block_type == BOutput else 'L'
+                    if len(block.lasers) == 1:
+                        print(f"{letter}t", end='')
+                    elif block.lasers:
+                        print(f"{letter}#", end='')
+                    else:
+                        print(f"{letter}f", end='')
+                elif block_type == BBridge:
+                    facings = drawn.get((col, row), ())
+                    vertical = 'w' in facings or 's' in facings
+                    horizontal = 'a' in facings or 'd' in facings
+                    if vertical and horizontal:
+                        print("Bt", end='')
+                    elif vertical:
+                        print("Bl", end='')
+                    elif horizontal:
+                        print("B-", end='')
+                    else:
+                        print("Bf", end='')
+            elif (col, row) in drawn:  # no block at coordinates, find lasers at coordinates
+                if len(drawn[(col, row)]) == 1:
+                    print(f"{facing_dict[drawn[(col, row)][0]]} ", end='')
+                else:
+                    print("# ", end='')
+            else:
+                print("  ", end='')
+            if col != max_x:
+                print("|", end='')
+        if row != min_y:
+            print(f"\n{'-- ' * (max_x - min_x + 2)}")
+
+
+def run_solution():
+    global warm_simulation
+    simulation = warm_simulation if warm_simulation is not None else Simulation()
+    if warm:
+        warm_simulation = simulation
+    while True:
+        option = input('''\n\n'r': Step
+'help2': Show symbol meanings in solution
+'show_laser': Show laser list (not usable in main menu)
+'esc': Go back to main menu (clears lasers unless in warm mode, does not clear blocks; use 'clear' later): ''')
+        if option == 'r':
+            simulation.step()
+            tile_print()
+        elif option == 'show_laser':
+            print(list(laser_list.values()))
+        elif option == 'help2':
+            print('''
+Each cell is represented by 2 characters. The first character is either a letter representing a block (key under
+'help1', except the redirector, which is represented by 'WASD' showing its direction), or one of these: (^ > v < #), the
+first 4 representing lasers and their direction, the last representing where 2+ lasers cross or meet.
+
+Redirector/Splitter: 't' when active, 'f' when not.
+Blocker/Output: 't' when hit by a single laser, '#' when hit by multiple lasers (output still considered to be in 'on'
+state), 'f' when not hit by any laser.
+
+Generator: '^ > v <', showing which direction it is facing.
+
+Input: '^ > v < f', first 4 same as generator if it is active, last one indicates that it is inactive.
+
+Bridge: '- l t', if lasers pass through it horizontally, vertically or both respectively; 'f' if no lasers within.
+
+''')
+        elif option == 'esc':
+            if not warm:
+                simulation.reset()
+            return
+        elif option == 'q':
+            return 'q'
+        else:
+            print("Unrecognised command.")
 
 
-print("WARNING: WORK IN PROGRESS. Play with idealaser_s.py first, sorry.")  # TODO remove
-print('''Welcome to IdeaLaser (blocktime evaluation version).
+if __name__ == '__main__':
+    print("WARNING: WORK IN PROGRESS. Play with idealaser_s.py first, sorry.")  # TODO remove
+    print('''Welcome to IdeaLaser (blocktime evaluation version).
 Challenge: create logical gates using the tools provided.''')
-while True:
-    if main_menu() == 'q':
-        break
-    else:
-        tile_print()
-        if run_solution() == 'q':
+    while True:
+        if main_menu() == 'q':
             break
+        else:
+            tile_print()
+            if run_solution() == 'q':
+                break
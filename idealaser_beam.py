@@ -0,0 +1,324 @@
+"""
+IDEALaser (Simultaneous Evaluation) beam backend
+
+Generators and always-on inputs fill whole wires with pulses, one per tile. Instead of moving each of those pulses, this
+backend keeps the pulses of each facing as beams: runs of pulses on consecutive tiles of one row (a/d) or column (w/s),
+stored as (first, last) positions along the line, sorted and merged. The usual 5 steps (see idealaser_s.py) then work on
+whole beams:
+
+1. Redirectors and splitters which are on look up whether a pulse faces back at their target tile with a bisect.
+
+2. Beams are cut where they are absorbed (a non-bridge block, or the edge of the board), where they overlap a beam
+facing the opposite way on the same line (which kills both, on empty tiles and bridges alike), and where they cross a
+perpendicular beam on an empty tile.
+
+3. Every beam moves 1 tile, by moving both of its ends.
+
+4. Spawned pulses are merged into the beam right in front of them, so the wire of a generator stays a single beam.
+
+5. Redirector, splitter and output tiles are occupied if a beam of any facing covers them.
+
+A cycle costs about the same for a wire of any length: it depends on the number of beams and crossings, not pulses.
+On top of that, only the dirty part of the board is stepped (see BeamSimulation.step()): a line whose beams, neighbours
+and spawns are all as they were last cycle comes out unchanged, so it is skipped. Once beams are steady, a cycle costs
+about as much as the part of the board which is still switching.
+"""
+from bisect import bisect_left, bisect_right, insort
+import idealaser_s
+from idealaser_s import SGenerator, SInput, SRedirector, SSplitter, SOutput, SBridge, StandaloneSimulation, \
+    advance_sequence
+from idealaser_globals import facing_index, facing_offset
+
+vertical_planes = (True, False, True, False)  # in 'wasd' order
+plane_signs = (1, -1, -1, 1)  # whether positions along the line grow (1) or shrink (-1) as pulses of the plane move
+
+
+def line_position(plane, x, y):  # (line, position along the line) of tile (x, y) for pulses of plane
+    return (x, y) if vertical_planes[plane] else (y, x)
+
+
+def covers(beams, position):  # whether any beam of a line's sorted list covers position
+    i = bisect_left(beams, (position + 1,))  # beams[:i] start at or before position
+    return i > 0 and beams[i - 1][1] >= position
+
+
+def insert(beams, position):  # add a pulse at position to a line's sorted list, merging it with the beams next to it
+    i = bisect_left(beams, (position + 1,))
+    if i > 0 and beams[i - 1][1] >= position - 1:
+        first, last = beams[i - 1]
+        if i < len(beams) and beams[i][0] == position + 1:
+            beams[i - 1:i + 1] = [(first, beams[i][1])]
+        else:
+            beams[i - 1] = first, max(last, position)
+    elif i < len(beams) and beams[i][0] == position + 1:
+        beams[i] = position, beams[i][1]
+    else:
+        beams.insert(i, (position, position))
+
+
+def subtract(beams, cuts):  # beams without the positions in cuts, both being sorted lists of (first, last)
+    result = []
+    j = 0
+    for first, last in beams:
+        while j < len(cuts) and cuts[j][1] < first:
+            j += 1
+        k = j
+        while k < len(cuts) and cuts[k][0] <= last:
+            if cuts[k][0] > first:
+                result.append((first, cuts[k][0] - 1))
+            first = max(first, cuts[k][1] + 1)
+            k += 1
+        if first <= last:
+            result.append((first, last))
+    return result
+
+
+class BeamSimulation(StandaloneSimulation):
+    """
+    Drop-in replacement for idealaser_s.Simulation, reading blocks from block_coordinates (or the given dict) and
+    starting from the reset state. Does not change the blocks or the globals of idealaser_s.
+    """
+    def __init__(self, blocks=None):
+        if blocks is None:
+            blocks = idealaser_s.block_coordinates
+        max_x, min_x, max_y, min_y = idealaser_s.edge(blocks)
+        # Interior (positions pulses survive at) of the lines of each orientation, by line_position()
+        self.interior = {True: ((min_x + 1, max_x - 1), (min_y + 1, max_y - 1)),
+                         False: ((min_y + 1, max_y - 1), (min_x + 1, max_x - 1))}
+        self.block_tiles = set(blocks)
+        self.walls = {True: {}, False: {}}  # vertical: line: sorted positions of the non-bridge blocks on it
+        self.generators = []  # (plane, target)
+        # (plane, target, block tile, mode) of redirectors and splitters: mode 1 fires always, 2 unless met (redirectors
+        # facing a bridge, which never fire, are left out)
+        self.firing = []
+        self.inputs = []  # (plane, target)
+        self.input_seqs = []
+        self.input_original_states = []
+        self.output_tiles = []
+        for (x, y), block in blocks.items():
+            block_type = type(block)
+            if block_type != SBridge:
+                for vertical in True, False:
+                    line, position = (x, y) if vertical else (y, x)
+                    self.walls[vertical].setdefault(line, []).append(position)
+            if block_type in (SGenerator, SInput, SRedirector):
+                plane = facing_index[block.facing]
+                dx, dy = facing_offset[plane]
+                target = x + dx, y + dy
+                if block_type == SGenerator:
+                    self.generators.append((plane, target))
+                elif block_type == SInput:
+                    self.inputs.append((plane, target))
+                    self.input_seqs.append(block.seq)
+                    self.input_original_states.append(block.original_state)
+                elif target not in blocks:
+                    self.firing.append((plane, target, (x, y), 2))
+                elif type(blocks[target]) != SBridge:
+                    self.firing.append((plane, target, (x, y), 1))
+            elif block_type == SSplitter:
+                for plane, (dx, dy) in enumerate(facing_offset):
+                    # Splitters fire into any adjacent block, bridges included (as SSplitter.prestep does)
+                    target = x + dx, y + dy
+                    self.firing.append((plane, target, (x, y), 1 if target in blocks else 2))
+            elif block_type == SOutput:
+                self.output_tiles.append((x, y))
+        for lines in self.walls.values():
+            for positions in lines.values():
+                positions.sort()
+        # What depends on each line, so that only what a changed line can affect is looked at again:
+        # the firing entries whose target is on it (by the plane facing back), or whose block tile is on it
+        self.firing_by_line = {}  # (plane, line): firing entry indices
+        self.firing_by_tile = {}  # block tile: firing entry indices
+        for i, (plane, target, tile, _) in enumerate(self.firing):
+            self.firing_by_line.setdefault(((plane + 2) % 4, line_position(plane, *target)[0]), []).append(i)
+            self.firing_by_tile.setdefault(tile, []).append(i)
+        self.state_tiles = {}  # (vertical, line): redirector, splitter and output tiles on it
+        for tile in set(self.firing_by_tile).union(self.output_tiles):
+            self.state_tiles.setdefault((True, tile[0]), []).append(tile)
+            self.state_tiles.setdefault((False, tile[1]), []).append(tile)
+        self.reset()
+    
+    @property
+    def cycle(self):
+        return self.cycle_count
+    
+    def reset(self):
+        self.cycle_count = 0
+        self.planes = [{}, {}, {}, {}]  # line: sorted list of (first, last) beams
+        self.lines = {True: [], False: []}  # vertical: sorted lines holding beams of either plane
+        self.occupied = set()  # occupied state tiles
+        self.input_states = list(self.input_original_states)
+        self.input_seq_indices = [0] * len(self.input_states)
+        self.input_seq_counts = [0] * len(self.input_states)
+        # Dirty set: the lines changed by the last step (with their beams from before it), the positions pulses are
+        # spawned at this step and the lines where they changed, and the firing entries to decide again
+        self.changed = {}  # (plane, line): previous beams
+        self.spawns = [{}, {}, {}, {}]  # line: set of positions
+        self.spawn_changed = set()  # (plane, line)
+        self.fired = set()  # firing entry indices
+        self.input_spawning = [False] * len(self.input_states)
+        self.recheck = set()  # firing entry indices
+        for plane, target in self.generators:
+            line, position = line_position(plane, *target)
+            self.spawns[plane].setdefault(line, set()).add(position)
+            self.spawn_changed.add((plane, line))
+    
+    def outputs(self):
+        return {coordinates: coordinates in self.occupied for coordinates in self.output_tiles}
+    
+    def state_key(self):
+        return tuple(tuple(sorted((line, tuple(beams)) for line, beams in plane.items())) for plane in self.planes), \
+            tuple(self.input_states), tuple(self.input_seq_indices), tuple(self.input_seq_counts)
+    
+    def is_deterministic(self):
+        return not any(0 in seq for seq in self.input_seqs)
+    
+    def pulses(self):
+        pulse_set = set()
+        for plane, lines in enumerate(self.planes):
+            for line, beams in lines.items():
+                for first, last in beams:
+                    for position in range(first, last + 1):
+                        pulse_set.add(((line, position) if vertical_planes[plane] else (position, line), 'wasd'[plane]))
+        return pulse_set
+    
+    def pulse_count(self):
+        return sum(last - first + 1 for lines in self.planes for beams in lines.values() for first, last in beams)
+    
+    def beams(self):  # {(facing, line, first, last)}, line being x for w/s and y for a/d
+        return {('wasd'[plane], line, first, last) for plane, lines in enumerate(self.planes)
+                for line, beams in lines.items() for first, last in beams}
+    
+    def covered(self, plane, tile):
+        line, position = line_position(plane, *tile)
+        return line in self.planes[plane] and covers(self.planes[plane][line], position)
+    
+    def set_spawn(self, plane, target, spawning):
+        line, position = line_position(plane, *target)
+        positions = self.spawns[plane].setdefault(line, set())
+        if spawning:
+            positions.add(position)
+        else:
+            positions.discard(position)
+        self.spawn_changed.add((plane, line))
+    
+    def advance_line(self, plane, line):
+        # Steps 2 to 4 for one line of a plane: its beams lose their cut, absorbed and off-board pulses, move, and get
+        # the pulses spawned onto it
+        planes = self.planes
+        beams = planes[plane].get(line, ())
+        vertical = vertical_planes[plane]
+        (low_line, high_line), (low, high) = self.interior[vertical]
+        if beams and low_line <= line <= high_line:
+            cuts = []
+            opposite = planes[(plane + 2) % 4].get(line, ())
+            j = 0
+            for first, last in beams:  # beams facing each other on the same line
+                while j < len(opposite) and opposite[j][1] < first:
+                    j += 1
+                k = j
+                while k < len(opposite) and opposite[k][0] <= last:
+                    cuts.append((max(first, opposite[k][0]), min(last, opposite[k][1])))
+                    k += 1
+            crossing_lines = self.lines[not vertical]
+            crossing_planes = (1, 3) if vertical else (0, 2)
+            walls = self.walls[vertical].get(line, ())
+            for first, last in beams:
+                for i in range(bisect_left(crossing_lines, first), bisect_right(crossing_lines, last)):
+                    position = crossing_lines[i]
+                    if ((line, position) if vertical else (position, line)) in self.block_tiles:
+                        continue
+                    for other in crossing_planes:  # perpendicular beams crossing on an empty tile
+                        if position in planes[other] and covers(planes[other][position], line):
+                            cuts.append((position, position))
+                            break
+                for i in range(bisect_left(walls, first), bisect_right(walls, last)):
+                    cuts.append((walls[i], walls[i]))
+            if beams[0][0] < low:
+                cuts.append((beams[0][0], low - 1))
+            if beams[-1][1] > high:
+                cuts.append((high + 1, beams[-1][1]))
+            if cuts:
+                cuts.sort()
+                beams = subtract(beams, cuts)
+            sign = plane_signs[plane]
+            beams = [(first + sign, last + sign) for first, last in beams]
+        else:
+            beams = []  # nothing, or the whole line is off the board
+        for position in sorted(self.spawns[plane].get(line, ())):
+            insert(beams, position)
+        return beams
+    
+    def step(self):
+        """
+        Steps only the dirty part of the board: a line of a plane is worked out again if it changed last step, if a beam
+        which may have cut it changed (on the same line facing back, or crossing it now or before), or if the pulses
+        spawned onto it changed. Any other line would come out as it is, so it is left alone: steady beams and quiet
+        parts of the board cost nothing.
+        """
+        planes = self.planes
+        changed = self.changed
+        # Step 1 and the spawns of step 4, for the redirectors/splitters whose tile or target changed, and the inputs
+        recheck = self.recheck
+        for key in changed:
+            recheck.update(self.firing_by_line.get(key, ()))
+        for i in recheck:
+            plane, target, tile, mode = self.firing[i]
+            fires = tile in self.occupied and (mode == 1 or not self.covered((plane + 2) % 4, target))
+            if fires != (i in self.fired):
+                if fires:
+                    self.fired.add(i)
+                else:
+                    self.fired.discard(i)
+                self.set_spawn(plane, target, fires)
+        self.recheck = set()
+        for i, seq in enumerate(self.input_seqs):  # same order as SInput.step calls, so random() is called alike
+            if self.input_states[i] != self.input_spawning[i]:
+                self.input_spawning[i] = self.input_states[i]
+                self.set_spawn(*self.inputs[i], self.input_states[i])
+            if seq:
+                self.input_states[i], self.input_seq_indices[i], self.input_seq_counts[i] = advance_sequence(
+                    seq, self.input_states[i], self.input_seq_indices[i], self.input_seq_counts[i])
+        # The dirty lines
+        dirty = set(self.spawn_changed)
+        self.spawn_changed = set()
+        for (plane, line), previous in changed.items():
+            dirty.add((plane, line))
+            dirty.add(((plane + 2) % 4, line))
+            vertical = vertical_planes[plane]
+            crossing_lines = self.lines[not vertical]
+            for first, last in planes[plane].get(line, []) + previous:
+                for i in range(bisect_left(crossing_lines, first), bisect_right(crossing_lines, last)):
+                    position = crossing_lines[i]
+                    for other in (1, 3) if vertical else (0, 2):
+                        if position in planes[other] and covers(planes[other][position], line):
+                            dirty.add((other, position))
+        # Step 2 to 4, all from the current beams before any of them is replaced
+        results = [(plane, line, self.advance_line(plane, line)) for plane, line in dirty]
+        self.changed = {}
+        for plane, line, beams in results:
+            previous = planes[plane].get(line, [])
+            if beams == previous:
+                continue
+            self.changed[plane, line] = previous
+            vertical = vertical_planes[plane]
+            other = planes[(plane + 2) % 4]
+            if beams:
+                if not previous and line not in other:
+                    insort(self.lines[vertical], line)
+                planes[plane][line] = beams
+            else:
+                del planes[plane][line]
+                if line not in other:
+                    del self.lines[vertical][bisect_left(self.lines[vertical], line)]
+        # Step 5, for the state tiles on changed lines
+        for plane, line in self.changed:
+            for tile in self.state_tiles.get((vertical_planes[plane], line), ()):
+                occupied = any(self.covered(other, tile) for other in range(4))
+                if occupied != (tile in self.occupied):
+                    if occupied:
+                        self.occupied.add(tile)
+                    else:
+                        self.occupied.discard(tile)
+                    self.recheck.update(self.firing_by_tile.get(tile, ()))
+        self.cycle_count += 1
@@ -0,0 +1,150 @@
+"""
+IDEALaser benchmarks
+
+Times the simultaneous evaluation engines on generated boards, printing the time per cycle and per live pulse for
+increasing board sizes. If the time per pulse stays flat as the number of pulses grows, a cycle scales linearly.
+
+Usage: python idealaser_bench.py (results can be redirected to bench_output.txt)
+"""
+from os import cpu_count
+from time import perf_counter
+import idealaser_s
+import idealaser_truth
+
+
+def engines():
+    # (name, Simulation class) for every engine that can be imported here
+    from idealaser_bits import BitboardSimulation
+    from idealaser_beam import BeamSimulation
+    engine_list = [('object', idealaser_s.Simulation), ('bitboard', BitboardSimulation), ('beam', BeamSimulation)]
+    try:
+        from idealaser_np import NumpySimulation
+        engine_list.append(('numpy', NumpySimulation))
+    except ImportError:
+        pass
+    return engine_list
+
+
+def build_wires(count, length, spacing=1):
+    # count generators in a column (spacing rows apart) firing right into blockers length tiles away, so that about
+    # count * (length - 1) pulses are in flight once the wires are filled
+    idealaser_s.block_coordinates, idealaser_s.pulse_list, idealaser_s.pulse_coordinates, idealaser_s.cycle_count = \
+        idealaser_s.init_globals()
+    for y in range(0, count * spacing, spacing):
+        idealaser_s.SGenerator(0, y, 'd')
+        idealaser_s.SBlocker(length, y)
+
+
+def bench_wires(count, length, cycles, engine=idealaser_s.Simulation, spacing=1):
+    build_wires(count, length, spacing)
+    simulation = engine()
+    simulation.run(length)  # fill the wires before timing
+    pulses = len(simulation.pulses())
+    start = perf_counter()
+    simulation.run(cycles)
+    elapsed = (perf_counter() - start) / cycles
+    return pulses, elapsed
+
+
+def build_quiet(count, length):
+    # wires as in build_wires(), next to a small core (an oscillating input relayed to an output) which keeps switching
+    build_wires(count, length, 2)
+    idealaser_s.SInput(-5, -10, 'd', 't', [1])
+    idealaser_s.SRedirector(0, -10, 'w')
+    idealaser_s.SOutput(0, -5)
+
+
+def bench_quiet(count, length, cycles, engine):
+    # time per cycle of the board of build_quiet(), once the wires have settled
+    build_quiet(count, length)
+    simulation = engine()
+    simulation.run(length + 10)
+    start = perf_counter()
+    simulation.run(cycles)
+    return (perf_counter() - start) / cycles
+
+
+def bench_jump(count, length, cycles):
+    # the board of build_quiet(), read at the given cycle: hashlife jumping there, against the bitboard backend finding
+    # the board's cycle and reading the outputs from it; returns both times
+    from idealaser_bits import BitboardSimulation
+    from idealaser_hash import HashlifeSimulation
+    build_quiet(count, length)
+    start = perf_counter()
+    jumped = HashlifeSimulation().run(cycles)
+    middle = perf_counter()
+    simulation = BitboardSimulation()
+    simulation.find_cycle()
+    assert simulation.outputs_at(cycles) == jumped
+    return middle - start, perf_counter() - middle
+
+
+def bench_sharded(count, length, cycles, processes):
+    # time per cycle of the board of build_wires() (spacing 2), split between processes worker processes
+    from idealaser_shard import ShardedSimulation
+    build_wires(count, length, 2)
+    with ShardedSimulation(processes=processes) as simulation:
+        simulation.run(length)
+        start = perf_counter()
+        simulation.run(cycles)
+        return (perf_counter() - start) / cycles
+
+
+def build_gate(inputs):
+    # inputs firing up through a bridged generator beam into outputs, with a redirector chain merging the inputs' pulses
+    # into an extra OR output; each scenario settles after a dozen or so cycles
+    idealaser_s.block_coordinates, idealaser_s.pulse_list, idealaser_s.pulse_coordinates, idealaser_s.cycle_count = \
+        idealaser_s.init_globals()
+    idealaser_s.SGenerator(-1, 3, 'd')
+    idealaser_s.SBlocker(inputs * 2, 3)
+    for x in range(0, inputs * 2, 2):
+        idealaser_s.SInput(x, 0, 'w', 'f', [])
+        idealaser_s.SBridge(x, 3)
+        idealaser_s.SSplitter(x, 6)
+        idealaser_s.SOutput(x, 8)
+        idealaser_s.SRedirector(x + 1, 6, 'd')
+    idealaser_s.SOutput(inputs * 2, 6)
+
+
+def bench_truth(inputs):
+    build_gate(inputs)
+    start = perf_counter()
+    separate = idealaser_truth.truth_table(processes=1)
+    middle = perf_counter()
+    lanes = idealaser_truth.truth_table_lanes()
+    end = perf_counter()
+    assert separate == lanes
+    return middle - start, end - middle
+
+
+def main():
+    print("Scaling with live pulses:")
+    print(f"{'engine':>8} {'pulses':>8} {'ms/cycle':>10} {'us/pulse':>10}")
+    for name, engine in engines():
+        for count, length in (10, 25), (20, 50), (40, 100), (80, 100), (80, 200):
+            pulses, elapsed = bench_wires(count, length, 20, engine)
+            print(f"{name:>8} {pulses:>8} {elapsed * 1e3:>10.3f} {elapsed * 1e6 / pulses:>10.3f}")
+    print("\n500x500 board (250 wires), object engine left out as filling it takes minutes:")
+    for name, engine in engines()[1:]:
+        pulses, elapsed = bench_wires(250, 500, 5, engine, 2)
+        print(f"{name:>8} {pulses:>8} {elapsed * 1e3:>10.3f} {elapsed * 1e6 / pulses:>10.3f}")
+    print("\nSettled 500x1000 board (250 wires) around a small switching core:")
+    for name, engine in engines()[1:]:
+        print(f"{name:>8} {bench_quiet(250, 1000, 20, engine) * 1e3:>10.3f} ms/cycle")
+    print("\nOutputs at cycle 10^9 of that board, hashlife jump against bitboard find_cycle():")
+    for count, length in (50, 200), (250, 1000):
+        hashlife, bitboard = bench_jump(count, length, 10 ** 9)
+        print(f"{count:>4}x{length:<5} {hashlife:>9.3f}s {bitboard:>9.3f}s")
+    most = cpu_count() or 1
+    print(f"\nSharded 1000x1000 board (500 wires), 1 to {most} processes:")
+    for processes in sorted({min(1 << i, most) for i in range(most.bit_length() + 1)}):
+        print(f"{processes:>8} {bench_sharded(500, 1000, 50, processes) * 1e3:>10.3f} ms/cycle")
+    print("\nTruth tables, one bitboard run per input combination against one lane per combination:")
+    print(f"{'inputs':>8} {'separate':>10} {'lanes':>10}")
+    for inputs in 4, 6, 8:
+        separate, lanes = bench_truth(inputs)
+        print(f"{inputs:>8} {separate:>9.3f}s {lanes:>9.3f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+IDEALaser (Simultaneous Evaluation) bitboard backend
+
+Pure-Python alternative to idealaser_np.py for when NumPy is not available. Each facing's pulse plane over the edge()
+bounding box is packed into a single int, bit (x - min_x) + (y - min_y) * width standing for tile (x, y), so:
+
+1. Redirectors and splitters which are on (their tile is occupied) fire where their shifted bits are not met by a pulse
+facing back, or always when they fire into a block (never when a redirector fires into a bridge, as in idealaser_s.py).
+
+2. Collisions, block absorption and pulses leaving the board are ANDed away with the empty tile and bridge masks.
+
+3. Pulses advance by shifting each plane by 1 (horizontal) or width (vertical) bits.
+
+4. Generators, active inputs and firing redirectors/splitters are ORed in.
+
+5. The occupied tiles are the OR of the planes; outputs are read with bit tests.
+
+Since the board edge is 1 tile outside the blocks, shifting a surviving pulse never wraps it onto another row.
+"""
+import idealaser_s
+from idealaser_s import SGenerator, SInput, SRedirector, SSplitter, SOutput, SBridge, StandaloneSimulation, \
+    advance_sequence
+from idealaser_globals import facing_index, facing_offset
+
+
+class BitboardSimulation(StandaloneSimulation):
+    """
+    Drop-in replacement for idealaser_s.Simulation, reading blocks from block_coordinates (or the given dict) and
+    starting from the reset state. Does not change the blocks or the globals of idealaser_s. edges (as returned by
+    edge(), the default) can be given to step a window of a bigger board instead, as idealaser_shard.py does.
+    """
+    def __init__(self, blocks=None, edges=None):
+        if blocks is None:
+            blocks = idealaser_s.block_coordinates
+        max_x, min_x, max_y, min_y = idealaser_s.edge(blocks) if edges is None else edges
+        self.origin = min_x, min_y
+        self.width = width = max_x - min_x + 1
+        
+        def bit(x, y):
+            return 1 << (x - min_x + (y - min_y) * width)
+        
+        self.block_mask = 0
+        self.bridge_mask = 0
+        for coordinates, block in blocks.items():
+            self.block_mask |= bit(*coordinates)
+            if type(block) == SBridge:
+                self.bridge_mask |= bit(*coordinates)
+        interior = 0
+        for y in range(min_y + 1, max_y):
+            interior |= ((1 << (width - 2)) - 1) << (1 + (y - min_y) * width)
+        self.empty_mask = interior & ~self.block_mask
+        # Per facing: generator pulses, and redirectors which fire unless met by a pulse facing back (target is empty)
+        # or always (target is a non-bridge block)
+        self.generator_masks = [0, 0, 0, 0]
+        self.redirector_masks = [0, 0, 0, 0]
+        self.redirector_block_masks = [0, 0, 0, 0]
+        self.splitter_mask = 0
+        self.input_bits = []
+        self.input_seqs = []
+        self.input_original_states = []
+        self.output_bits = {}
+        for (x, y), block in blocks.items():
+            block_type = type(block)
+            if block_type in (SGenerator, SInput, SRedirector):
+                plane = facing_index[block.facing]
+                dx, dy = facing_offset[plane]
+                if block_type == SGenerator:
+                    self.generator_masks[plane] |= bit(x + dx, y + dy)
+                elif block_type == SInput:
+                    self.input_bits.append((plane, bit(x + dx, y + dy)))
+                    self.input_seqs.append(block.seq)
+                    self.input_original_states.append(block.original_state)
+                elif (x + dx, y + dy) not in blocks:
+                    self.redirector_masks[plane] |= bit(x, y)
+                elif type(blocks[x + dx, y + dy]) != SBridge:
+                    self.redirector_block_masks[plane] |= bit(x, y)
+            elif block_type == SSplitter:
+                self.splitter_mask |= bit(x, y)
+            elif block_type == SOutput:
+                self.output_bits[x, y] = bit(x, y)
+        self.reset()
+    
+    @property
+    def cycle(self):
+        return self.cycle_count
+    
+    def reset(self):
+        self.cycle_count = 0
+        self.planes = [0, 0, 0, 0]
+        self.occupied = 0
+        self.input_states = list(self.input_original_states)
+        self.input_seq_indices = [0] * len(self.input_states)
+        self.input_seq_counts = [0] * len(self.input_states)
+    
+    def outputs(self):
+        return {coordinates: bool(self.occupied & bit) for coordinates, bit in self.output_bits.items()}
+    
+    def state_key(self):
+        return tuple(self.planes), tuple(self.input_states), tuple(self.input_seq_indices), tuple(self.input_seq_counts)
+    
+    def is_deterministic(self):
+        return not any(0 in seq for seq in self.input_seqs)
+    
+    def pulses(self):
+        min_x, min_y = self.origin
+        pulse_set = set()
+        for plane, mask in enumerate(self.planes):
+            while mask:
+                index = (mask & -mask).bit_length() - 1
+                pulse_set.add(((index % self.width + min_x, index // self.width + min_y), 'wasd'[plane]))
+                mask &= mask - 1
+        return pulse_set
+    
+    def pulse_count(self):
+        return sum(bin(plane).count('1') for plane in self.planes)
+    
+    def shift(self, mask, plane):  # move every bit of mask 1 tile in the facing of plane
+        if plane == 0:
+            return mask << self.width
+        elif plane == 1:
+            return mask >> 1
+        elif plane == 2:
+            return mask >> self.width
+        else:
+            return mask << 1
+    
+    def step(self):
+        w, a, s, d = self.planes
+        occupied = self.occupied
+        shift = self.shift
+        # Step 1 (fired pulses are kept per plane, and added in step 4)
+        fired = [0, 0, 0, 0]
+        opposite = s, d, w, a
+        active_splitters = occupied & self.splitter_mask
+        for plane in 0, 1, 2, 3:
+            fired[plane] = (shift(occupied & self.redirector_masks[plane], plane) & ~opposite[plane]) \
+                | shift(occupied & self.redirector_block_masks[plane], plane) \
+                | (shift(active_splitters, plane) & (self.block_mask | ~opposite[plane]))
+        # Step 2
+        empty = self.empty_mask
+        bridge = self.bridge_mask
+        w, a, s, d = w & ((empty & ~(a | s | d)) | (bridge & ~s)), a & ((empty & ~(w | s | d)) | (bridge & ~d)), \
+            s & ((empty & ~(w | a | d)) | (bridge & ~w)), d & ((empty & ~(w | a | s)) | (bridge & ~a))
+        # Step 3 and 4
+        planes = [w << self.width, a >> 1, s >> self.width, d << 1]
+        for plane in 0, 1, 2, 3:
+            planes[plane] |= self.generator_masks[plane] | fired[plane]
+        for i, seq in enumerate(self.input_seqs):  # same order as SInput.step calls, so random() is called alike
+            if self.input_states[i]:
+                planes[self.input_bits[i][0]] |= self.input_bits[i][1]
+            if seq:
+                self.input_states[i], self.input_seq_indices[i], self.input_seq_counts[i] = advance_sequence(
+                    seq, self.input_states[i], self.input_seq_indices[i], self.input_seq_counts[i])
+        # Step 5
+        self.planes = planes
+        self.occupied = planes[0] | planes[1] | planes[2] | planes[3]
+        self.cycle_count += 1
@@ -0,0 +1,171 @@
+"""
+IDEALaser backend equivalence check
+
+Builds random boards and steps each one with every backend next to idealaser_s.Simulation, comparing outputs() and
+pulses() after every cycle. Every backend is meant to give exactly the same results, so any difference is a bug; the
+first one found per backend is printed. Inputs with random (0) sequence entries are used on some boards, with the same
+random seed for every backend, except for the backends which refuse them (hashlife, lanes, sharded). Also checks that
+the backends reject edit() and checkpoints with TypeError, and that saving and loading layouts (idealaser_layout.py)
+rejects blocks a layout cannot store with ValueError.
+
+Usage: python idealaser_check.py [boards (default 150)] [cycles (default 30)]; exits with status 1 on any failure.
+"""
+from random import Random, seed
+import sys
+import idealaser_s
+from idealaser_layout import Layout
+from idealaser_bits import BitboardSimulation
+from idealaser_beam import BeamSimulation
+from idealaser_hash import HashlifeSimulation
+from idealaser_lanes import LaneSimulation
+
+
+class LaneTrace:  # a LaneSimulation of the board's own input states as a single lane, read as a plain Simulation
+    def __init__(self):
+        blocks = idealaser_s.block_coordinates
+        self.simulation = LaneSimulation([tuple(blocks[k].original_state for k in sorted(
+            k for k, block in blocks.items() if type(block) == idealaser_s.SInput))])
+    
+    def step(self):
+        self.simulation.step()
+    
+    def outputs(self):
+        return self.simulation.lane_outputs(0)
+    
+    def pulses(self):
+        return self.simulation.lane_pulses(0)
+
+
+def engines():
+    # (name, Simulation class or factory, whether it takes random inputs, boards between uses) for every backend
+    engine_list = [('bitboard', BitboardSimulation, True, 1), ('beam', BeamSimulation, True, 1),
+                   ('hashlife', HashlifeSimulation, False, 1), ('lanes', LaneTrace, False, 1)]
+    try:
+        from idealaser_np import NumpySimulation
+        engine_list.append(('numpy', NumpySimulation, True, 1))
+    except ImportError:
+        pass
+    from idealaser_shard import ShardedSimulation
+    engine_list.append(('sharded', lambda: ShardedSimulation(processes=2), False, 10))  # starting workers is slow
+    return engine_list
+
+
+def build_random(rng, random_inputs):
+    # up to 40 random blocks on a board of up to 8x8, as the main menu would place them
+    idealaser_s.block_coordinates, idealaser_s.pulse_list, idealaser_s.pulse_coordinates, idealaser_s.cycle_count = \
+        idealaser_s.init_globals()
+    size = rng.randrange(2, 9)
+    for _ in range(rng.randrange(1, 40)):
+        coordinates = rng.randrange(size), rng.randrange(size)
+        if coordinates in idealaser_s.block_coordinates:
+            continue
+        block_id = rng.choice('grplbio')
+        words = [block_id, *map(str, coordinates)]
+        if block_id in 'gri':
+            words.append(rng.choice('wasd'))
+        if block_id == 'i':
+            words.append(rng.choice('tf'))
+            words.extend(str(rng.randrange(0 if random_inputs else 1, 4)) for _ in range(rng.randrange(3)))
+        idealaser_s.add_block(words)
+
+
+def trace(engine, cycles, random_seed):
+    # (outputs, pulses) after each cycle
+    simulation = engine()
+    seed(random_seed)
+    records = []
+    for _ in range(cycles):
+        simulation.step()
+        records.append((simulation.outputs(), simulation.pulses()))
+    if hasattr(simulation, 'close'):
+        simulation.close()
+    return records
+
+
+def check(boards=150, cycles=30):
+    # returns the number of backends which differed from Simulation on some board
+    rng = Random(0)
+    failed = set()
+    for board in range(boards):
+        random_inputs = board % 3 == 0
+        build_random(rng, random_inputs)
+        # Simulation steps the blocks themselves, so it runs on a copy of them and leaves the originals for the others
+        blocks = idealaser_s.block_coordinates
+        world = idealaser_s.World()
+        for block in blocks.values():
+            words = [idealaser_s.block_class_ids[type(block)], *map(str, block.coordinates)]
+            if hasattr(block, 'facing'):
+                words.append(block.facing)
+            if type(block) == idealaser_s.SInput:
+                words.append('t' if block.original_state else 'f')
+                words.extend(map(str, block.seq))
+            idealaser_s.add_block(words, world)
+        expected = trace(lambda: idealaser_s.Simulation(world), cycles, board)
+        for name, engine, takes_random, every in engines():
+            if name in failed or board % every or (random_inputs and not takes_random):
+                continue
+            for cycle, (want, got) in enumerate(zip(expected, trace(engine, cycles, board)), 1):
+                if want != got:
+                    failed.add(name)
+                    print(f"{name} differs on board {board} at cycle {cycle}: {sorted(blocks.values(), key=repr)}")
+                    print(f"    expected {want}\n    got      {got}")
+                    break
+    return len(failed)
+
+
+def check_unsupported():
+    # returns the number of backends which did not reject what they do not support with TypeError
+    idealaser_s.block_coordinates, idealaser_s.pulse_list, idealaser_s.pulse_coordinates, idealaser_s.cycle_count = \
+        idealaser_s.init_globals()
+    for words in ['i', '0', '0', 'd', 't', '1'], ['o', '2', '0']:
+        idealaser_s.add_block(words)
+    failures = 0
+    for name, engine, _, _ in engines():
+        if name == 'lanes':  # not a Simulation
+            continue
+        simulation = engine()
+        for method, arguments in ('edit', ((0, 0),)), ('keep_checkpoints', ()), ('snapshot', ()), ('restore', (None,)):
+            try:
+                getattr(simulation, method)(*arguments)
+            except TypeError:
+                continue
+            except Exception as error:
+                print(f"{name} {method}() raised {type(error).__name__}: {error}")
+            else:
+                print(f"{name} {method}() did not raise TypeError")
+            failures += 1
+        if hasattr(simulation, 'close'):
+            simulation.close()
+    return failures
+
+
+def check_layouts():
+    # returns the number of out of range blocks which saving (block_layout()) or loading (from_text()) did not reject
+    failures = 0
+    for words in ['g', str(2 ** 31), '0', 'd'], ['l', '0', str(-2 ** 31 - 1)], ['i', '0', '0', 'd', 't', str(2 ** 32)]:
+        world = idealaser_s.World()
+        idealaser_s.add_block(words, world)
+        for name, attempt in ('save', lambda: idealaser_s.block_layout(world.block_coordinates)), \
+                ('load', lambda: Layout.from_text(' '.join(words))):
+            try:
+                attempt()
+            except ValueError:
+                continue
+            except Exception as error:
+                print(f"{name} of {' '.join(words)!r} raised {type(error).__name__}: {error}")
+            else:
+                print(f"{name} of {' '.join(words)!r} did not raise ValueError")
+            failures += 1
+    return failures
+
+
+if __name__ == '__main__':
+    arguments = [int(argument) for argument in sys.argv[1:3]]
+    failures = check(*arguments)
+    print("All backends agree." if not failures else f"{failures} backend(s) differ.")
+    unsupported_failures = check_unsupported()
+    print("Backends reject what they do not support." if not unsupported_failures
+          else f"{unsupported_failures} backend methods did not raise TypeError.")
+    layout_failures = check_layouts()
+    print("Layouts reject out of range blocks." if not layout_failures else f"{layout_failures} layout checks failed.")
+    sys.exit(1 if failures or unsupported_failures or layout_failures else 0)
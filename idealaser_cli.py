@@ -0,0 +1,131 @@
+"""
+IDEALaser command line
+
+Runs simultaneous evaluation solutions without prompts and prints JSON: the state of every output at every cycle, the
+cost, area and cycle count (as tile_print() shows them), and timings. A solution is a layout file (.ilt or .ilb, see
+idealaser_layout.py), an old pickled save (.pickle), or a script of main menu block commands, one per line, e.g.:
+    g 1 2 d
+    i 0 0 d t 1
+    o 5 0
+(blank lines and lines starting with # are skipped). Given a directory, every .ilt, .ilb, .pickle and .txt solution
+in it is run in this one process, and one JSON object is printed per line, in file name order.
+
+Usage:
+    python idealaser_cli.py solution.txt --cycles 100
+    python idealaser_cli.py solution.pickle --steady --engine bits
+    python idealaser_cli.py solutions --steady --max-cycles 10000 --summary > results.jsonl
+"""
+from argparse import ArgumentParser
+from json import dumps
+from os import listdir, path
+from random import seed
+from time import perf_counter
+import idealaser_s
+from idealaser_layout import read_layout
+
+engine_names = 'object', 'bits', 'numpy', 'beam', 'hash'
+
+
+def engine_class(name):  # Simulation class of one of engine_names, imported when first used
+    if name == 'object':
+        return idealaser_s.Simulation
+    elif name == 'bits':
+        from idealaser_bits import BitboardSimulation
+        return BitboardSimulation
+    elif name == 'numpy':
+        from idealaser_np import NumpySimulation
+        return NumpySimulation
+    elif name == 'beam':
+        from idealaser_beam import BeamSimulation
+        return BeamSimulation
+    from idealaser_hash import HashlifeSimulation
+    return HashlifeSimulation
+
+
+def load_solution(file_path):
+    # replaces the globals of idealaser_s with the solution in file_path; raises ValueError if it cannot be read
+    idealaser_s.block_coordinates, idealaser_s.pulse_list, idealaser_s.pulse_coordinates, idealaser_s.cycle_count = \
+        idealaser_s.init_globals()
+    if file_path.endswith('.pickle'):
+        idealaser_s.block_coordinates = idealaser_s.load_pickled_blocks(file_path)
+        return
+    idealaser_s.block_coordinates = {}  # nothing is edited, so the columns and rows of a BlockDict would go unused
+    idealaser_s.place_layout(read_layout(file_path))
+    if not idealaser_s.block_coordinates:
+        raise ValueError("no blocks")
+
+
+def run_file(file_path, engine='object', cycles=None, max_cycles=None, summary=False):
+    """
+    Runs the solution in file_path and returns its JSON-ready result: cycles times, or with cycles None until it is
+    steady or periodic (at most max_cycles cycles), giving the transient and period found, and the state of each output
+    at infinity (see Simulation.find_cycle() and limit_outputs()). Output states are lists by cycle from cycle 0, keyed
+    'x,y'; with summary, only the last ones are given.
+    """
+    start = perf_counter()
+    load_solution(file_path)
+    blocks = idealaser_s.block_coordinates
+    loaded = perf_counter()
+    simulation = engine_class(engine)()
+    compiled = perf_counter()
+    if cycles is None:
+        found = simulation.find_cycle(max_cycles)
+        history = simulation.output_history
+    else:
+        history = [simulation.outputs()]
+        history.extend(outputs for _, outputs, _ in simulation.iter_cycles(cycles))
+    ran = perf_counter()
+    result = {
+        'file': file_path,
+        'engine': engine,
+        'cost': idealaser_s.cost(blocks),
+        'area': idealaser_s.area(blocks),
+        'cycles': simulation.cycle,
+    }
+    if summary:
+        result['outputs'] = {f'{x},{y}': state for (x, y), state in history[-1].items()}
+    else:
+        result['outputs'] = {f'{x},{y}': [states[x, y] for states in history] for x, y in history[0]}
+    if cycles is None:
+        result['transient'], result['period'] = found if found is not None else (None, None)
+        if found is not None:
+            result['limit'] = {f'{x},{y}': state for (x, y), state in simulation.limit_outputs().items()}
+    result['time'] = {'load': loaded - start, 'compile': compiled - loaded, 'run': ran - compiled}
+    return result
+
+
+def solution_files(directory):
+    return [path.join(directory, name) for name in sorted(listdir(directory))
+            if name.endswith(('.ilt', '.ilb', '.pickle', '.txt')) and path.isfile(path.join(directory, name))]
+
+
+def main(argv=None):
+    parser = ArgumentParser(description="Run IDEALaser solutions without prompts, printing JSON results.")
+    parser.add_argument('solution', help="a .pickle save, a block command script, or a directory of them")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--cycles', type=int, help="number of cycles to run")
+    group.add_argument('--steady', action='store_true', help="run until the solution is steady or periodic")
+    parser.add_argument('--max-cycles', type=int, help="with --steady, give up after this many cycles")
+    parser.add_argument('--engine', choices=engine_names, default='object')
+    parser.add_argument('--seed', type=int, help="seed for inputs with random (0) sequence entries")
+    parser.add_argument('--summary', action='store_true', help="only give the last output states")
+    parser.add_argument('--indent', type=int, help="indent a single solution's JSON (not used for directories)")
+    args = parser.parse_args(argv)
+    if args.cycles is not None and args.cycles < 0:
+        parser.error("--cycles must be 0 or more")
+    directory = path.isdir(args.solution)
+    failed = False
+    for file_path in solution_files(args.solution) if directory else [args.solution]:
+        if args.seed is not None:
+            seed(args.seed)
+        try:
+            result = run_file(file_path, args.engine, args.cycles, args.max_cycles, args.summary)
+        except Exception as error:  # one bad file does not stop the rest of a directory
+            result = {'file': file_path, 'error': f'{type(error).__name__}: {error}'}
+            failed = True
+        print(dumps(result, indent=None if directory else args.indent), flush=True)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
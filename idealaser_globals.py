@@ -1,3 +1,4 @@
+from bisect import bisect_left, bisect_right, insort
 facing_dict = {
     'w': '^',
     'a': '<',
@@ -10,6 +11,9 @@ opposite_face_dict = {
     's': 'w',
     'd': 'a'
 }
+facing_index = {'w': 0, 'a': 1, 's': 2, 'd': 3}  # plane order used by the array/bitboard engines
+facing_offset = ((0, 1), (-1, 0), (0, -1), (1, 0))  # (dx, dy) of each facing, in 'wasd' order
+facing_offset_dict = {facing: facing_offset[i] for facing, i in facing_index.items()}
 # Price rules:
 # 1. Input and output must cost 0. (unless output is modified to allow lasers to be reused?)
 # 2. Generator + Dual < Generator + Splitter <= 2 Generator < Generator + Dual + Redirector
@@ -25,3 +29,140 @@ cost_dict = {  # edit this to edit block costs
     'i': 0,  # input (must be 0)
     'o': 0  # output (must be 0)
 }
+
+
+class BlockDict(dict):
+    """
+    dict of blocks by (x, y), used for block_coordinates. Keeps a sorted list of the blocks in every column and row as
+    blocks are added and deleted, so that the extents of the board are read in O(1) instead of scanning every block, and
+    the first block in any direction from a tile is found with a bisect (next_block()). The extents are only recomputed
+    (from the columns and rows, not the blocks) after the outermost column or row has been emptied.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self.columns = {}  # x: sorted y of the blocks in column x
+        self.rows = {}  # y: sorted x of the blocks in row y
+        self.extents = None  # (max_x, min_x, max_y, min_y) of the blocks, or None if it needs recomputing
+        self.update(*args, **kwargs)
+    
+    def __reduce__(self):  # pickle as a plain dict of blocks, the columns and rows are rebuilt when loading
+        return type(self), (dict(self),)
+    
+    def __setitem__(self, key, value):
+        if key not in self:
+            x, y = key
+            insort(self.columns.setdefault(x, []), y)
+            insort(self.rows.setdefault(y, []), x)
+            if self.extents is not None:
+                max_x, min_x, max_y, min_y = self.extents
+                self.extents = max(max_x, x), min(min_x, x), max(max_y, y), min(min_y, y)
+            elif len(self) == 0:
+                self.extents = x, x, y, y
+        super().__setitem__(key, value)
+    
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        x, y = key
+        column = self.columns[x]
+        del column[bisect_left(column, y)]
+        if not column:
+            del self.columns[x]
+            if self.extents is not None and x in self.extents[:2]:
+                self.extents = None
+        row = self.rows[y]
+        del row[bisect_left(row, x)]
+        if not row:
+            del self.rows[y]
+            if self.extents is not None and y in self.extents[2:]:
+                self.extents = None
+    
+    def pop(self, key, *default):
+        if key in self:
+            value = self[key]
+            del self[key]
+            return value
+        return super().pop(key, *default)
+    
+    def popitem(self):
+        key, value = super().popitem()
+        super().__setitem__(key, value)
+        del self[key]
+        return key, value
+    
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+    
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+    
+    def clear(self):
+        super().clear()
+        self.columns.clear()
+        self.rows.clear()
+        self.extents = None
+    
+    def copy(self):
+        return type(self)(self)
+    
+    def edge(self):
+        # The board (1 tile outside the outermost blocks) as (max_x, min_x, max_y, min_y); see edge() in idealaser_s.py
+        if self.extents is None:
+            if not self:
+                raise ValueError("No blocks placed.")
+            self.extents = max(self.columns), min(self.columns), max(self.rows), min(self.rows)
+        max_x, min_x, max_y, min_y = self.extents
+        return max_x + 1, min_x - 1, max_y + 1, min_y - 1
+    
+    def next_block(self, coordinates, facing):
+        # Coordinates of the first block met going from coordinates (not included) towards facing, or None if there is
+        # none before infinity
+        x, y = coordinates
+        if facing in ('w', 's'):
+            line, position = self.columns.get(x), y
+        else:
+            line, position = self.rows.get(y), x
+        if line is None:
+            return None
+        if facing in ('w', 'd'):
+            i = bisect_right(line, position)
+            if i == len(line):
+                return None
+        else:
+            i = bisect_left(line, position) - 1
+            if i < 0:
+                return None
+        return (x, line[i]) if facing in ('w', 's') else (line[i], y)
+
+
+class LaserIndex:
+    """
+    Lasers along one axis by line (vertical lasers by x-column, or horizontal lasers by y-row), with the lines kept in
+    a sorted list like the columns and rows of BlockDict, so that the lasers crossing a path are found with a bisect
+    (used by idealaser_b.py).
+    """
+    def __init__(self):
+        self.lines = {}  # line: {lasers: None}
+        self.keys = []
+    
+    def add(self, line, laser):
+        if line not in self.lines:
+            insort(self.keys, line)
+            self.lines[line] = {}
+        self.lines[line][laser] = None
+    
+    def remove(self, line, laser):
+        del self.lines[line][laser]
+        if not self.lines[line]:
+            del self.lines[line]
+            del self.keys[bisect_left(self.keys, line)]
+    
+    def between(self, low, high, reverse=False):  # lines from low to high, both included
+        start, stop = bisect_left(self.keys, low), bisect_right(self.keys, high)
+        return (self.keys[i] for i in (range(stop - 1, start - 1, -1) if reverse else range(start, stop)))
+    
+    def clear(self):
+        self.lines.clear()
+        self.keys.clear()
@@ -0,0 +1,296 @@
+"""
+IDEALaser (Simultaneous Evaluation) hashlife backend
+
+The usual 5 steps (see idealaser_s.py) only ever look 1 tile away: whether a pulse survives depends on its own tile,
+where it goes and what a block spawns depends on the tile next to it, and redirectors, splitters and outputs are on
+when their tile holds a pulse. So the board can be stepped like Conway's Life with Gosper's hashlife:
+
+1. Each tile is a cell: the kind of its block (with whatever it precomputes from its neighbours, like fire modes),
+its pulses as a facing mask, and for inputs their sequence position. Off the board is a cell kind which absorbs pulses.
+
+2. The board is a quadtree of 2x2 nodes. Equal nodes are the same object (they are made by join() only), so repeated
+parts of the board, like wires or copies of the same gate, are stored once.
+
+3. successor(node, j) is the centre half of a node 2^j cycles later, worked out from overlapping quarters and
+memoized on the node. A cycle of a node seen before costs a dict lookup, and a jump of 2^j cycles costs about j times
+as much as one cycle once the board repeats itself in space and time.
+
+Inputs keep their sequence position in their cell, so only deterministic inputs (no random 0 entry) are supported.
+run(cycles) jumps straight to cycle + cycles, so run(10 ** 9) takes as long as about 30 steps of an already seen board.
+"""
+import idealaser_s
+from idealaser_s import SGenerator, SInput, SRedirector, SSplitter, SOutput, SBridge, StandaloneSimulation, \
+    advance_sequence, opposite_bits
+from idealaser_globals import facing_index, facing_offset
+
+
+class Cell:
+    """
+    A tile (a leaf of the quadtree). kind is '' (empty), '#' (off the board), 'b' (bridge), 'o' (output), 'l' (blockers,
+    and redirectors facing a bridge, which never fire), or 'g', 'i', 'r', 'p' (the blocks which spawn pulses); plane is
+    the facing of generators, inputs and redirectors, modes the fire mode of redirectors (1 always, 2 unless met) and
+    splitters (one per plane), seq the sequence of inputs. mask holds the pulses, by facing bit, and input the (state,
+    seq_index, seq_count) of inputs. Cells are interned by HashlifeSimulation.cell(), and never changed.
+    """
+    __slots__ = 'kind', 'plane', 'modes', 'seq', 'mask', 'input', 'level', 'pulses'
+    
+    def __init__(self, kind, plane, modes, seq, mask, input_state):
+        self.kind, self.plane, self.modes, self.seq, self.mask, self.input = kind, plane, modes, seq, mask, input_state
+        self.level = 0
+        self.pulses = mask != 0
+    
+    def __repr__(self):
+        return f'Cell{self.kind, self.plane, self.modes, self.mask, self.input}'
+
+
+class Node:
+    """
+    A 2^level square of cells, made of 4 quarters: a (top left, lowest x and y), b (top right), c (bottom left) and
+    d (bottom right). pulses says whether any cell in it holds a pulse, and results maps j to successor(node, j).
+    Nodes are interned by HashlifeSimulation.join(), and never changed.
+    """
+    __slots__ = 'a', 'b', 'c', 'd', 'level', 'pulses', 'results'
+    
+    def __init__(self, a, b, c, d):
+        self.a, self.b, self.c, self.d = a, b, c, d
+        self.level = a.level + 1
+        self.pulses = a.pulses or b.pulses or c.pulses or d.pulses
+        self.results = {}
+    
+    def __repr__(self):
+        return f'Node(level={self.level}, pulses={self.pulses})'
+
+
+class HashlifeSimulation(StandaloneSimulation):
+    """
+    Drop-in replacement for idealaser_s.Simulation, reading blocks from block_coordinates (or the given dict) and
+    starting from the reset state. Does not change the blocks or the globals of idealaser_s. The node tables live as
+    long as the simulation does, so reset() and find_cycle() reuse everything already worked out.
+    """
+    def __init__(self, blocks=None):
+        if blocks is None:
+            blocks = idealaser_s.block_coordinates
+        self.cells = {}  # (kind, plane, modes, seq, mask, input): Cell
+        self.nodes = {}  # (a, b, c, d): Node
+        self.empty = [self.cell('', None, None, None, 0, None)]  # empty node of each level
+        max_x, min_x, max_y, min_y = idealaser_s.edge(blocks)
+        tiles = {}  # (x, y): Cell of every tile which is not empty
+        for x in range(min_x, max_x + 1):
+            tiles[x, min_y] = tiles[x, max_y] = self.cell('#', None, None, None, 0, None)
+        for y in range(min_y, max_y + 1):
+            tiles[min_x, y] = tiles[max_x, y] = self.cell('#', None, None, None, 0, None)
+        self.output_tiles = []
+        self.input_seqs = []
+        for (x, y), block in blocks.items():
+            block_type = type(block)
+            if block_type in (SGenerator, SInput, SRedirector):
+                plane = facing_index[block.facing]
+                dx, dy = facing_offset[plane]
+                if block_type == SGenerator:
+                    tiles[x, y] = self.cell('g', plane, None, None, 0, None)
+                elif block_type == SInput:
+                    self.input_seqs.append(block.seq)
+                    tiles[x, y] = self.cell('i', plane, None, tuple(block.seq), 0, (block.original_state, 0, 0))
+                elif (x + dx, y + dy) not in blocks:
+                    tiles[x, y] = self.cell('r', plane, 2, None, 0, None)
+                elif type(blocks[x + dx, y + dy]) != SBridge:
+                    tiles[x, y] = self.cell('r', plane, 1, None, 0, None)
+                else:  # never fires into a bridge, as in idealaser_s.py
+                    tiles[x, y] = self.cell('l', None, None, None, 0, None)
+            elif block_type == SSplitter:
+                # Splitters fire into any adjacent block, bridges included (as SSplitter.prestep does)
+                tiles[x, y] = self.cell('p', None, tuple(1 if (x + dx, y + dy) in blocks else 2
+                                                         for dx, dy in facing_offset), None, 0, None)
+            elif block_type == SOutput:
+                self.output_tiles.append((x, y))
+                tiles[x, y] = self.cell('o', None, None, None, 0, None)
+            elif block_type == SBridge:
+                tiles[x, y] = self.cell('b', None, None, None, 0, None)
+            else:
+                tiles[x, y] = self.cell('l', None, None, None, 0, None)
+        if not self.is_deterministic():
+            raise ValueError("Inputs with random (0) sequence entries cannot be memoized.")
+        # The board sits in the centre half of the root, so that successor() of the root holds all of it; the root is
+        # kept at this level (see advance()), so that equal states are the same root
+        size = max(max_x - min_x, max_y - min_y) + 1
+        self.level = max(3, (size - 1).bit_length() + 1)
+        quarter = 1 << (self.level - 2)
+        self.start_origin = min_x - quarter, min_y - quarter
+        self.start_root = self.build(self.level, *self.start_origin, tiles)
+        self.reset()
+    
+    @property
+    def cycle(self):
+        return self.cycle_count
+    
+    def reset(self):
+        self.cycle_count = 0
+        self.root = self.start_root
+        self.origin = self.start_origin  # coordinates of the top left cell of the root
+    
+    def cell(self, kind, plane, modes, seq, mask, input_state):
+        key = kind, plane, modes, seq, mask, input_state
+        cell = self.cells.get(key)
+        if cell is None:
+            cell = self.cells[key] = Cell(*key)
+        return cell
+    
+    def join(self, a, b, c, d):
+        key = a, b, c, d
+        node = self.nodes.get(key)
+        if node is None:
+            node = self.nodes[key] = Node(a, b, c, d)
+        return node
+    
+    def empty_node(self, level):
+        while len(self.empty) <= level:
+            empty = self.empty[-1]
+            self.empty.append(self.join(empty, empty, empty, empty))
+        return self.empty[level]
+    
+    def build(self, level, x, y, tiles):  # node of the given level with its top left cell at (x, y)
+        if not tiles:
+            return self.empty_node(level)
+        if level == 0:
+            return tiles[x, y]
+        half = 1 << (level - 1)
+        quarters = {}, {}, {}, {}
+        for (tile_x, tile_y), cell in tiles.items():
+            quarters[(tile_x >= x + half) + 2 * (tile_y >= y + half)][tile_x, tile_y] = cell
+        return self.join(self.build(level - 1, x, y, quarters[0]), self.build(level - 1, x + half, y, quarters[1]),
+                         self.build(level - 1, x, y + half, quarters[2]),
+                         self.build(level - 1, x + half, y + half, quarters[3]))
+    
+    def centre(self, node):  # node of 1 level up, with node in its centre half and empty cells around it
+        empty = self.empty_node(node.level - 1)
+        return self.join(self.join(empty, empty, empty, node.a), self.join(empty, empty, node.b, empty),
+                         self.join(empty, node.c, empty, empty), self.join(node.d, empty, empty, empty))
+    
+    def inner(self, node):  # centre half of node
+        return self.join(node.a.d, node.b.c, node.c.b, node.d.a)
+    
+    def next_cell(self, cell, sources):
+        # Steps 1 to 5 for one tile: sources[plane] is the tile a pulse of that plane comes from, and which spawns it
+        mask = 0
+        met = cell.mask
+        for plane in 0, 1, 2, 3:
+            source = sources[plane]
+            bit = 1 << plane
+            kind = source.kind
+            if source.mask & bit and ((kind == '' and source.mask == bit)
+                                      or (kind == 'b' and not source.mask & opposite_bits[plane])):
+                mask |= bit
+            elif kind == 'g' or kind == 'i':
+                if source.plane == plane and (kind == 'g' or source.input[0]):
+                    mask |= bit
+            elif kind == 'r':
+                if source.plane == plane and source.mask and (source.modes == 1 or not met & opposite_bits[plane]):
+                    mask |= bit
+            elif kind == 'p':
+                if source.mask and (source.modes[plane] == 1 or not met & opposite_bits[plane]):
+                    mask |= bit
+        input_state = cell.input
+        if cell.seq:
+            input_state = advance_sequence(cell.seq, *input_state)
+        if mask == cell.mask and input_state == cell.input:
+            return cell
+        return self.cell(cell.kind, cell.plane, cell.modes, cell.seq, mask, input_state)
+    
+    def successor(self, node, j):
+        """
+        The centre half of node (of level 2 or more) after 2^j cycles, j being at most level - 2.
+        """
+        result = node.results.get(j)
+        if result is not None:
+            return result
+        if node.level == 2:
+            a, b, c, d = node.a, node.b, node.c, node.d
+            rows = (a.a, a.b, b.a, b.b), (a.c, a.d, b.c, b.d), (c.a, c.b, d.a, d.b), (c.c, c.d, d.c, d.d)
+            new = [[self.next_cell(rows[row][column], [rows[row - dy][column - dx] for dx, dy in facing_offset])
+                    for column in (1, 2)] for row in (1, 2)]
+            result = self.join(new[0][0], new[0][1], new[1][0], new[1][1])
+        else:
+            a, b, c, d = node.a, node.b, node.c, node.d
+            join = self.join
+            # The 9 overlapping nodes of level - 1 tiling the node, each moved on by 2^j cycles (or half of it)
+            half = j if j < node.level - 2 else j - 1
+            n00 = self.successor(a, half)
+            n01 = self.successor(join(a.b, b.a, a.d, b.c), half)
+            n02 = self.successor(b, half)
+            n10 = self.successor(join(a.c, a.d, c.a, c.b), half)
+            n11 = self.successor(join(a.d, b.c, c.b, d.a), half)
+            n12 = self.successor(join(b.c, b.d, d.a, d.b), half)
+            n20 = self.successor(c, half)
+            n21 = self.successor(join(c.b, d.a, c.d, d.c), half)
+            n22 = self.successor(d, half)
+            if j < node.level - 2:  # already 2^j cycles on: take the centres
+                result = join(join(n00.d, n01.c, n10.b, n11.a), join(n01.d, n02.c, n11.b, n12.a),
+                              join(n10.d, n11.c, n20.b, n21.a), join(n11.d, n12.c, n21.b, n22.a))
+            else:  # 2^(j - 1) cycles on: the other half from the 4 overlapping quarters
+                result = join(self.successor(join(n00, n01, n10, n11), half),
+                              self.successor(join(n01, n02, n11, n12), half),
+                              self.successor(join(n10, n11, n20, n21), half),
+                              self.successor(join(n11, n12, n21, n22), half))
+        node.results[j] = result
+        return result
+    
+    def advance(self, cycles):
+        # Jumps cycles ahead, 2^j cycles for each bit j of cycles; the root is grown as much as a jump needs, then
+        # cropped back, which only drops empty cells as nothing ever leaves the board
+        j = 0
+        while cycles >> j:
+            if cycles >> j & 1:
+                x, y = self.origin
+                while self.root.level < j + 2:
+                    quarter = 1 << (self.root.level - 1)
+                    x, y = x - quarter, y - quarter
+                    self.root = self.centre(self.root)
+                self.root = self.centre(self.successor(self.root, j))
+                while self.root.level > self.level:
+                    quarter = 1 << (self.root.level - 2)
+                    x, y = x + quarter, y + quarter
+                    self.root = self.inner(self.root)
+                self.origin = x, y
+            j += 1
+        self.cycle_count += cycles
+    
+    def step(self):
+        self.advance(1)
+    
+    def run(self, cycles):
+        self.advance(cycles)
+        return self.outputs()
+    
+    def cell_at(self, x, y):
+        node = self.root
+        x -= self.origin[0]
+        y -= self.origin[1]
+        while node.level:
+            half = 1 << (node.level - 1)
+            right, down = x >= half, y >= half
+            node = (node.a, node.b, node.c, node.d)[right + 2 * down]
+            x, y = x - half * right, y - half * down
+        return node
+    
+    def outputs(self):
+        return {coordinates: self.cell_at(*coordinates).mask != 0 for coordinates in self.output_tiles}
+    
+    def state_key(self):
+        return self.root  # nodes are interned, so equal states are the same node
+    
+    def is_deterministic(self):
+        return not any(0 in seq for seq in self.input_seqs)
+    
+    def pulses(self):
+        pulse_set = set()
+        stack = [(self.root, *self.origin)]
+        while stack:
+            node, x, y = stack.pop()
+            if not node.pulses:
+                continue
+            if node.level == 0:
+                pulse_set.update(((x, y), 'wasd'[plane]) for plane in range(4) if node.mask >> plane & 1)
+                continue
+            half = 1 << (node.level - 1)
+            stack += (node.a, x, y), (node.b, x + half, y), (node.c, x, y + half), (node.d, x + half, y + half)
+        return pulse_set
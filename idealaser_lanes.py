@@ -0,0 +1,189 @@
+"""
+IDEALaser (Simultaneous Evaluation) bit-parallel scenarios
+
+Steps many input scenarios of one solution at once. Instead of a bool, every pulse, input state and redirector/splitter/
+output state is a lane mask: an int where bit j means "true in scenario j", so a single pass of the usual 5 steps (see
+idealaser_s.py) advances every scenario. Any number of lanes can be used, as Python ints have no width limit.
+
+Scenarios differ only in the starting state (t/f) of each input block; sequences are shared, so an input's lanes all
+toggle together. Inputs with random (0) sequence entries are not supported, as each scenario would need its own draws.
+"""
+import idealaser_s
+from idealaser_s import SGenerator, SInput, SRedirector, SSplitter, SOutput, SBridge, StandaloneSimulation, \
+    advance_sequence
+from idealaser_globals import facing_index, facing_offset
+
+
+class LaneSimulation(StandaloneSimulation):
+    """
+    Simulation of len(scenarios) scenarios, each a tuple of input starting states ordered as self.input_coordinates
+    (sorted). Reads blocks from block_coordinates (or the given dict) and starts from the reset state.
+    outputs() gives lane masks; lane_outputs(j) gives scenario j's output states as Simulation.outputs() would.
+    """
+    def __init__(self, scenarios, blocks=None):
+        if blocks is None:
+            blocks = idealaser_s.block_coordinates
+        self.lanes = len(scenarios)
+        self.all_lanes = (1 << self.lanes) - 1
+        max_x, min_x, max_y, min_y = idealaser_s.edge(blocks)
+        self.origin = min_x, min_y
+        self.width = width = max_x - min_x + 1
+        self.height = max_y - min_y + 1
+        # Tiles are flat indices, as in idealaser_bits.py, so moving a pulse is adding its facing's offset
+        self.offsets = width, -1, -width, 1
+        self.bridges = set()
+        self.blocks = set()
+        self.generators = []  # (plane, target tile)
+        # (plane, target tile, block tile, mode): mode 1 fires always, 2 unless met; redirectors which never fire (into
+        # a bridge) are left out
+        self.redirectors = []
+        self.splitters = []  # same as redirectors
+        self.output_tiles = {}
+        self.input_coordinates = sorted(k for k, block in blocks.items() if type(block) == SInput)
+        self.inputs = []  # (plane, target tile, seq, starting lane mask)
+        for (x, y), block in blocks.items():
+            tile = x - min_x + (y - min_y) * width
+            block_type = type(block)
+            self.blocks.add(tile)
+            if block_type == SBridge:
+                self.bridges.add(tile)
+            elif block_type in (SGenerator, SInput, SRedirector):
+                plane = facing_index[block.facing]
+                dx, dy = facing_offset[plane]
+                target = tile + self.offsets[plane]
+                if block_type == SGenerator:
+                    self.generators.append((plane, target))
+                elif block_type == SInput:
+                    if 0 in block.seq:
+                        raise ValueError("Inputs with random (0) sequence entries cannot share lanes.")
+                    column = self.input_coordinates.index((x, y))
+                    lanes = sum(1 << lane for lane, scenario in enumerate(scenarios) if scenario[column])
+                    self.inputs.append((plane, target, block.seq, lanes))
+                elif (x + dx, y + dy) not in blocks:
+                    self.redirectors.append((plane, target, tile, 2))
+                elif type(blocks[x + dx, y + dy]) != SBridge:
+                    self.redirectors.append((plane, target, tile, 1))
+            elif block_type == SSplitter:
+                for plane, (dx, dy) in enumerate(facing_offset):
+                    # Splitters fire into any adjacent block, bridges included (as SSplitter.prestep does)
+                    self.splitters.append((plane, tile + self.offsets[plane], tile,
+                                           1 if (x + dx, y + dy) in blocks else 2))
+            elif block_type == SOutput:
+                self.output_tiles[x, y] = tile
+        self.state_tiles = {tile for _, _, tile, _ in self.redirectors + self.splitters}
+        self.state_tiles.update(self.output_tiles.values())
+        self.reset()
+    
+    @property
+    def cycle(self):
+        return self.cycle_count
+    
+    def reset(self):
+        self.cycle_count = 0
+        self.planes = [{}, {}, {}, {}]
+        self.occupied = {}  # lane mask of occupied tiles, for redirector/splitter/output tiles only
+        self.input_states = [lanes for _, _, _, lanes in self.inputs]
+        self.input_seq_indices = [0] * len(self.inputs)
+        self.input_seq_counts = [0] * len(self.inputs)
+    
+    def state_key(self):
+        return tuple(frozenset(plane.items()) for plane in self.planes), tuple(self.input_states), \
+            tuple(self.input_seq_indices), tuple(self.input_seq_counts)
+    
+    def is_deterministic(self):
+        return True  # random sequences are refused in __init__
+    
+    def outputs(self):
+        return {coordinates: self.occupied.get(tile, 0) for coordinates, tile in self.output_tiles.items()}
+    
+    def lane_outputs(self, lane):
+        return {coordinates: bool(mask >> lane & 1) for coordinates, mask in self.outputs().items()}
+    
+    def pulses(self):  # {((x, y), facing, lane mask)}
+        min_x, min_y = self.origin
+        return {((tile % self.width + min_x, tile // self.width + min_y), 'wasd'[plane], lanes)
+                for plane, tiles in enumerate(self.planes) for tile, lanes in tiles.items()}
+    
+    def lane_pulses(self, lane):
+        return {(coordinates, facing) for coordinates, facing, lanes in self.pulses() if lanes >> lane & 1}
+    
+    def limit_outputs(self):
+        # one dict per lane, as Simulation.limit_outputs() would give for that scenario
+        ever_true = {}
+        ever_false = {}
+        for states in self.output_history[self.transient - self.history_start:]:
+            for k, mask in states.items():
+                ever_true[k] = ever_true.get(k, 0) | mask
+                ever_false[k] = ever_false.get(k, 0) | (~mask & self.all_lanes)
+        limits = []
+        for lane in range(self.lanes):
+            limit = {}
+            for k in ever_true:
+                if not ever_false[k] >> lane & 1:
+                    limit[k] = True
+                elif not ever_true[k] >> lane & 1:
+                    limit[k] = False
+                else:
+                    limit[k] = None
+            limits.append(limit)
+        return limits
+    
+    def step(self):
+        w, a, s, d = planes = self.planes
+        occupied = self.occupied
+        # Step 1
+        fired = [{}, {}, {}, {}]
+        for plane, target, tile, mode in self.redirectors + self.splitters:
+            lanes = occupied.get(tile, 0)
+            if lanes and mode == 2:
+                lanes &= ~planes[(plane + 2) % 4].get(target, 0)
+            if lanes:
+                fired[plane][target] = fired[plane].get(target, 0) | lanes
+        # Step 2 and 3
+        new_planes = [{}, {}, {}, {}]
+        new_w, new_a, new_s, new_d = new_planes
+        up, left, down, right = self.offsets
+        width = self.width
+        last_row = width * (self.height - 1)
+        for tile in set(w).union(a, s, d):
+            mw, ma, ms, md = w.get(tile, 0), a.get(tile, 0), s.get(tile, 0), d.get(tile, 0)
+            if tile in self.blocks:
+                if tile not in self.bridges:
+                    continue
+                mw, ms, ma, md = mw & ~ms, ms & ~mw, ma & ~md, md & ~ma
+            elif tile < width or tile >= last_row or tile % width in (0, width - 1):
+                continue  # left the board
+            else:
+                mw, ma, ms, md = mw & ~(ma | ms | md), ma & ~(mw | ms | md), ms & ~(mw | ma | md), md & ~(mw | ma | ms)
+            if mw:
+                new_w[tile + up] = mw
+            if ma:
+                new_a[tile + left] = ma
+            if ms:
+                new_s[tile + down] = ms
+            if md:
+                new_d[tile + right] = md
+        # Step 4
+        for plane, target in self.generators:
+            new_planes[plane][target] = new_planes[plane].get(target, 0) | self.all_lanes
+        for plane in 0, 1, 2, 3:
+            new_plane = new_planes[plane]
+            for target, lanes in fired[plane].items():
+                new_plane[target] = new_plane.get(target, 0) | lanes
+        for i, (plane, target, seq, _) in enumerate(self.inputs):
+            if self.input_states[i]:
+                new_planes[plane][target] = new_planes[plane].get(target, 0) | self.input_states[i]
+            if seq:
+                # every lane toggles at the same cycles, so only whether this cycle toggles is needed
+                toggle, self.input_seq_indices[i], self.input_seq_counts[i] = advance_sequence(
+                    seq, False, self.input_seq_indices[i], self.input_seq_counts[i])
+                if toggle:
+                    self.input_states[i] ^= self.all_lanes
+        # Step 5
+        self.planes = new_planes
+        self.occupied = {}
+        for tile in self.state_tiles:
+            lanes = new_w.get(tile, 0) | new_a.get(tile, 0) | new_s.get(tile, 0) | new_d.get(tile, 0)
+            if lanes:
+                self.occupied[tile] = lanes
+        self.cycle_count += 1
@@ -0,0 +1,204 @@
+"""
+IDEALaser layout files
+
+Versioned save format for simultaneous evaluation solutions, in place of pickled block_coordinates (which only load
+while the block classes are unchanged). A layout stores each block as plain fields, so it is read without importing or
+calling any block class; idealaser_s.py builds blocks from it (place_layout()). Two variants of version 1:
+
+Text (.ilt): a header line, then one main menu block command per line (see 'help1'), e.g.:
+    IDEALaser layout 1
+    g 1 2 d
+    i 0 0 d t 1
+    o 5 0
+Blank lines and lines starting with # are skipped. Without the header, a file of block commands is read as version 1.
+
+Binary (.ilb): for loading many solutions quickly. A 16 byte header (struct '<4sHHII': b'ILAY', version, 0, number of
+blocks n, number of sequence entries m), then the columns of Layout, little endian and 4 byte aligned: xs and ys (n
+int32 each), seq_ends (n uint32), seqs (m uint32), then ids, facings and states (n bytes each). The columns are read
+in place from the file's bytes, or from a memory map with map_layout(), without a Python object per block.
+"""
+from array import array
+from mmap import mmap, ACCESS_READ
+from os import listdir, path
+from struct import Struct
+import sys
+
+version = 1
+text_header = 'IDEALaser layout'
+binary_header = Struct('<4sHHII')
+binary_magic = b'ILAY'
+block_ids = 'grplbio'  # block IDs as in 'help1'
+facing_ids = ('g', 'r', 'i')  # block IDs which take a direction
+int32_min, int32_max, uint32_max = -2 ** 31, 2 ** 31 - 1, 2 ** 32 - 1  # ranges of the xs, ys and seqs columns
+valid_facings = {(ord(block_id), ord(facing)) for block_id in block_ids
+                 for facing in (('w', 'a', 's', 'd') if block_id in facing_ids else ('-',))}  # (ID, facing) bytes
+
+
+def check_record(block_id, x, y, facing, state, seq):  # raises ValueError if a block cannot be stored
+    if block_id not in block_ids:
+        raise ValueError(f"Unknown block ID {block_id!r}.")
+    if (facing in ('w', 'a', 's', 'd')) != (block_id in facing_ids):
+        raise ValueError(f"Invalid direction {facing!r} for block ID {block_id!r}.")
+    if not (int32_min <= x <= int32_max and int32_min <= y <= int32_max):
+        raise ValueError(f"Coordinates ({x}, {y}) of block {block_id!r} are outside {int32_min}..{int32_max}.")
+    if any(not 0 <= entry <= uint32_max for entry in seq):
+        raise ValueError(f"Sequence entries of block {block_id!r} at ({x}, {y}) must be 0 to {uint32_max}.")
+
+
+class Layout:
+    """
+    A solution's blocks as parallel columns, entry i being one block: xs and ys (coordinates), ids (bytes of block IDs,
+    as in 'help1'), facings (bytes of 'w', 'a', 's', 'd', or '-' for blocks without a direction), states (bytes, 1 for
+    inputs starting on) and the input sequences, all concatenated in seqs, block i's ending at seq_ends[i].
+    """
+    def __init__(self, xs, ys, ids, facings, states, seq_ends, seqs):
+        self.xs, self.ys, self.ids, self.facings, self.states, self.seq_ends, self.seqs = \
+            xs, ys, ids, facings, states, seq_ends, seqs
+    
+    def __repr__(self):
+        return f'{type(self).__name__}(blocks={len(self)})'
+    
+    def __len__(self):
+        return len(self.xs)
+    
+    def __iter__(self):  # (block ID, x, y, facing or None, state, sequence) of each block
+        start = 0
+        for i in range(len(self.xs)):
+            end = self.seq_ends[i]
+            facing = chr(self.facings[i])
+            yield chr(self.ids[i]), self.xs[i], self.ys[i], None if facing == '-' else facing, bool(self.states[i]), \
+                list(self.seqs[start:end])
+            start = end
+    
+    @classmethod
+    def from_records(cls, records):
+        # records as __iter__ yields them; raises ValueError as check_record() does
+        xs, ys, seq_ends, seqs = array('i'), array('i'), array('I'), array('I')
+        ids, facings, states = bytearray(), bytearray(), bytearray()
+        for block_id, x, y, facing, state, seq in records:
+            check_record(block_id, x, y, facing, state, seq)
+            xs.append(x)
+            ys.append(y)
+            ids.append(ord(block_id))
+            facings.append(ord(facing or '-'))
+            states.append(bool(state))
+            seqs.extend(seq)
+            seq_ends.append(len(seqs))
+        return cls(xs, ys, bytes(ids), bytes(facings), bytes(states), seq_ends, seqs)
+    
+    @classmethod
+    def from_text(cls, text):
+        # raises ValueError (with the line number) for a newer version or an invalid line
+        records = []
+        for line_number, line in enumerate(text.splitlines(), 1):
+            words = line.split()
+            if not words or words[0].startswith('#'):
+                continue
+            if line.startswith(text_header):
+                if int(words[-1]) > version:
+                    raise ValueError(f"Layout version {words[-1]} is newer than this program's ({version}).")
+                continue
+            try:
+                block_id, x, y = words[0], int(words[1]), int(words[2])
+                if block_id in facing_ids:
+                    facing = words[3]
+                    state = block_id == 'i' and words[4] == 't'
+                    seq = [int(entry) for entry in words[5:] if int(entry) >= 0] if block_id == 'i' else []
+                else:
+                    facing, state, seq = None, False, []
+                check_record(block_id, x, y, facing, state, seq)
+            except (IndexError, ValueError) as error:
+                raise ValueError(f"line {line_number}: invalid block command {line.strip()!r}"
+                                 + (f" ({error})" if isinstance(error, ValueError) else '')) from None
+            records.append((block_id, x, y, facing, state, seq))
+        return cls.from_records(records)
+    
+    def to_text(self):
+        lines = [f'{text_header} {version}']
+        for block_id, x, y, facing, state, seq in self:
+            if block_id == 'i':
+                lines.append(' '.join([block_id, str(x), str(y), facing, 't' if state else 'f', *map(str, seq)]))
+            elif facing is not None:
+                lines.append(f'{block_id} {x} {y} {facing}')
+            else:
+                lines.append(f'{block_id} {x} {y}')
+        return '\n'.join(lines) + '\n'
+    
+    @classmethod
+    def from_buffer(cls, buffer):
+        # binary layout from any bytes-like object (bytes, mmap), its columns being views into it
+        view = memoryview(buffer)
+        if len(view) < binary_header.size:
+            raise ValueError("Not a binary layout.")
+        magic, file_version, _, n, m = binary_header.unpack_from(view)
+        if magic != binary_magic:
+            raise ValueError("Not a binary layout.")
+        if file_version > version:
+            raise ValueError(f"Layout version {file_version} is newer than this program's ({version}).")
+        if len(view) != binary_header.size + 15 * n + 4 * m:
+            raise ValueError("Binary layout is truncated or corrupt.")
+        offset = binary_header.size
+        columns = []
+        for format_char, count in ('i', n), ('i', n), ('I', n), ('I', m), ('B', n), ('B', n), ('B', n):
+            size = 1 if format_char == 'B' else 4
+            column = view[offset:offset + count * size]
+            if format_char == 'B':
+                columns.append(column)
+            elif sys.byteorder == 'little':
+                columns.append(column.cast(format_char))
+            else:
+                column = array(format_char, column)
+                column.byteswap()
+                columns.append(column)
+            offset += count * size
+        xs, ys, seq_ends, seqs, ids, facings, states = columns
+        # the checks check_record() makes on text, over whole columns at once
+        if not set(zip(ids, facings)) <= valid_facings:
+            raise ValueError("Binary layout has a block with an unknown ID or an invalid direction.")
+        if bytes(states).translate(None, b'\x00\x01'):
+            raise ValueError("Binary layout has an invalid input state.")
+        if any(end < start for start, end in zip(seq_ends, seq_ends[1:])) or (n and seq_ends[-1] != m):
+            raise ValueError("Binary layout has invalid sequence ends.")
+        return cls(xs, ys, ids, facings, states, seq_ends, seqs)
+    
+    def to_bytes(self):
+        parts = [binary_header.pack(binary_magic, version, 0, len(self), len(self.seqs))]
+        for format_char, column in ('i', self.xs), ('i', self.ys), ('I', self.seq_ends), ('I', self.seqs):
+            column = array(format_char, column)
+            if sys.byteorder != 'little':
+                column.byteswap()
+            parts.append(column.tobytes())
+        parts.extend(bytes(column) for column in (self.ids, self.facings, self.states))
+        return b''.join(parts)
+
+
+def read_layout(file_path):
+    # text or binary layout, told apart by the binary header; raises ValueError if it is neither
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    if data.startswith(binary_magic):
+        return Layout.from_buffer(data)
+    try:
+        return Layout.from_text(data.decode())
+    except UnicodeDecodeError:
+        raise ValueError("Not a layout file.") from None
+
+
+def map_layout(file_path):
+    # binary layout read through a memory map, so only the pages used are read (for very large boards)
+    with open(file_path, 'rb') as f:
+        return Layout.from_buffer(mmap(f.fileno(), 0, access=ACCESS_READ))
+
+
+def write_layout(file_path, layout):  # binary if file_path ends in .ilb, otherwise text
+    if file_path.endswith('.ilb'):
+        with open(file_path, 'wb') as f:
+            f.write(layout.to_bytes())
+    else:
+        with open(file_path, 'w', newline='\n') as f:
+            f.write(layout.to_text())
+
+
+def layout_files(directory):  # paths of the .ilt and .ilb files in directory, by name
+    return [path.join(directory, name) for name in sorted(listdir(directory))
+            if name.endswith(('.ilt', '.ilb')) and path.isfile(path.join(directory, name))]
@@ -0,0 +1,350 @@
+"""
+IDEALaser solution library
+
+Catalogues saved solutions in an SQLite database (library.sqlite3 in 'IDEALaser Saves' by default), so they can be
+searched by what they do and how well they do it instead of by file name. Each distinct layout is stored once, keyed
+by a hash of its blocks (layout_hash()), with:
+- its block counts per type, cost (from cost_dict) and area (as tile_print() shows them), filled in by scan();
+- its truth table, as function: for each output (by coordinates), the state at infinity for every combination of input
+starting states ('0', '1', or 'x' if it keeps changing), in itertools.product order, the first input (by coordinates)
+being the slowest to change; and cycles: how many cycles it takes for every combination to settle into its cycle.
+These are filled in by score(), on worker processes, only for layouts not scored before.
+
+scan() only reads files whose size or modification time changed since the last scan, so keeping the library up to
+date after adding a few solutions is quick. gate_functions names the common 1-output functions, e.g. the cheapest AND
+gate with an area of at most 12:
+    library = Library()
+    library.scan()
+    library.score()
+    library.find(function='and', max_area=12, limit=1)
+
+Usage: python idealaser_library.py scan|score|find|pareto|histogram ... (see --help)
+"""
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from hashlib import sha256
+from itertools import product
+from json import dumps, loads
+from os import cpu_count, makedirs, path, walk
+import sqlite3
+from threading import Thread
+import idealaser_s
+from idealaser_s import World, block_layout, place_layout, area, load_pickled_blocks
+from idealaser_layout import Layout, read_layout
+from idealaser_lanes import LaneSimulation
+from idealaser_globals import cost_dict
+
+default_database = path.join('IDEALaser Saves', 'library.sqlite3')
+metrics = 'cost', 'area', 'cycles'
+count_columns = {'g': 'generators', 'r': 'redirectors', 'p': 'splitters', 'l': 'blockers', 'b': 'bridges',
+                 'i': 'inputs', 'o': 'outputs'}  # by block ID
+gate_functions = {  # function of 1-output solutions by name
+    'buffer': '01', 'not': '10',
+    'and': '0001', 'or': '0111', 'xor': '0110', 'nand': '1110', 'nor': '1000', 'xnor': '1001',
+}
+schema = f'''
+CREATE TABLE IF NOT EXISTS solutions (
+    hash TEXT PRIMARY KEY,
+    layout BLOB NOT NULL,
+    {', '.join(f'{column} INTEGER NOT NULL' for column in count_columns.values())},
+    cost INTEGER NOT NULL,
+    area INTEGER NOT NULL,
+    scored INTEGER NOT NULL DEFAULT 0,
+    cycles INTEGER,
+    period INTEGER,
+    function TEXT,
+    truth_table TEXT,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    hash TEXT NOT NULL REFERENCES solutions (hash)
+);
+CREATE INDEX IF NOT EXISTS solutions_scored ON solutions (scored);
+CREATE INDEX IF NOT EXISTS files_hash ON files (hash);
+{''.join(f'CREATE INDEX IF NOT EXISTS solutions_function_{metric} ON solutions (function, {metric});'
+         for metric in metrics)}
+'''
+
+
+def canonical_layout(layout):  # the same blocks in coordinate order, so equal solutions give equal bytes
+    return Layout.from_records(sorted(layout, key=lambda record: (record[1], record[2])))
+
+
+def layout_hash(layout):
+    return sha256(canonical_layout(layout).to_bytes()).hexdigest()
+
+
+def read_solution(file_path):  # Layout of a layout file or an old pickled save
+    if file_path.endswith('.pickle'):
+        return block_layout(load_pickled_blocks(file_path))
+    return read_layout(file_path)
+
+
+def score_layout(data, max_cycles=None):
+    """
+    Runs every combination of input starting states of a binary layout (as stored in the library) at once with
+    LaneSimulation, and returns (cycles, period, function, truth table) as stored; cycles, period and function are None
+    if it does not settle within max_cycles. Raises ValueError for random inputs.
+    """
+    world = World()
+    world.block_coordinates = {}
+    blocks = place_layout(Layout.from_buffer(data), world)
+    input_coordinates = sorted(k for k, block in blocks.items() if type(block) == idealaser_s.SInput)
+    assignments = list(product((False, True), repeat=len(input_coordinates)))
+    simulation = LaneSimulation(assignments, blocks)
+    found = simulation.find_cycle(max_cycles)
+    if found is None:
+        return None, None, None, None
+    limits = simulation.limit_outputs()
+    output_coordinates = sorted(limits[0])
+    function = ','.join(''.join('x' if limit[k] is None else str(int(limit[k])) for limit in limits)
+                        for k in output_coordinates)
+    truth_table = dumps({'inputs': input_coordinates, 'outputs': output_coordinates,
+                         'rows': [[[int(state) for state in assignment], [limit[k] for k in output_coordinates]]
+                                  for assignment, limit in zip(assignments, limits)]})
+    return found[0], found[1], function, truth_table
+
+
+class Library:
+    """
+    The solution catalogue in the SQLite database at database_path (created, with its folder, if missing). Queries
+    return rows as dicts of the solutions table's columns, without the layout (see layout()).
+    """
+    def __init__(self, database_path=default_database):
+        self.database_path = database_path
+        makedirs(path.dirname(database_path) or '.', exist_ok=True)
+        self.connection = sqlite3.connect(database_path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(schema)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def close(self):
+        self.connection.close()
+    
+    def add(self, layout, file_path=None, size=0, mtime=0):
+        # adds a layout (if it is new) and returns its hash; file_path, if given, is recorded as holding it
+        canonical = canonical_layout(layout)
+        data = canonical.to_bytes()
+        solution_hash = sha256(data).hexdigest()
+        counts = dict.fromkeys(count_columns.values(), 0)
+        for block_id in canonical.ids:
+            counts[count_columns[chr(block_id)]] += 1
+        world = World()
+        world.block_coordinates = {}
+        blocks = place_layout(canonical, world)
+        cost = sum(cost_dict[chr(block_id)] for block_id in canonical.ids)
+        with self.connection:
+            self.connection.execute(
+                f"INSERT OR IGNORE INTO solutions (hash, layout, {', '.join(counts)}, cost, area) "
+                f"VALUES (?, ?, {', '.join('?' * len(counts))}, ?, ?)",
+                (solution_hash, data, *counts.values(), cost, area(blocks)))
+            if file_path is not None:
+                self.connection.execute("INSERT OR REPLACE INTO files (path, size, mtime, hash) VALUES (?, ?, ?, ?)",
+                                        (file_path, size, mtime, solution_hash))
+        return solution_hash
+    
+    def scan(self, folder='IDEALaser Saves'):
+        """
+        Adds the solutions (.ilt, .ilb and .pickle files) in folder and its subfolders, reading only files which are
+        new or changed since the last scan, and forgets files which are gone. Returns (files read, errors), errors
+        being (file path, message) of the files which could not be read.
+        """
+        known = {row['path']: (row['size'], row['mtime'])
+                 for row in self.connection.execute("SELECT path, size, mtime FROM files")}
+        seen = set()
+        read = 0
+        errors = []
+        for directory, _, names in walk(folder):
+            for name in sorted(names):
+                if not name.endswith(('.ilt', '.ilb', '.pickle')):
+                    continue
+                file_path = path.join(directory, name)
+                seen.add(file_path)
+                try:
+                    size, mtime = path.getsize(file_path), path.getmtime(file_path)
+                    if known.get(file_path) == (size, mtime):
+                        continue
+                    self.add(read_solution(file_path), file_path, size, mtime)
+                    read += 1
+                except Exception as error:  # one bad file does not stop the scan
+                    errors.append((file_path, f'{type(error).__name__}: {error}'))
+        with self.connection:
+            self.connection.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in known.keys() - seen])
+        return read, errors
+    
+    def score(self, max_cycles=10000, processes=None):
+        # scores every layout not scored yet on processes worker processes (default: the number of CPUs); returns how
+        # many were scored. Results are saved as they come in, so an interrupted run keeps its progress; a layout which
+        # fails is saved with its error, and does not stop the rest
+        pending = self.connection.execute("SELECT hash, layout FROM solutions WHERE scored = 0").fetchall()
+        if not pending:
+            return 0
+        if processes is None:
+            processes = min(cpu_count() or 1, len(pending))
+        with ProcessPoolExecutor(processes) as pool:
+            futures = {pool.submit(score_layout, row['layout'], max_cycles): row['hash'] for row in pending}
+            for future in as_completed(futures):
+                try:
+                    cycles, period, function, truth_table = future.result()
+                    error = None if cycles is not None else f"No cycle within {max_cycles} cycles."
+                except Exception as exception:  # e.g. random inputs (ValueError), or a worker out of memory
+                    cycles = period = function = truth_table = None
+                    error = f'{type(exception).__name__}: {exception}'
+                with self.connection:
+                    self.connection.execute(
+                        "UPDATE solutions SET scored = 1, cycles = ?, period = ?, function = ?, truth_table = ?, "
+                        "error = ? WHERE hash = ?", (cycles, period, function, truth_table, error, futures[future]))
+        return len(pending)
+    
+    def score_in_background(self, max_cycles=10000, processes=None):
+        # score() on a thread with its own connection, returning the started thread; queries keep working meanwhile
+        def run():
+            with Library(self.database_path) as library:
+                library.score(max_cycles, processes)
+        
+        thread = Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+    
+    def rescore(self, max_cycles=10000, processes=None):  # scores every layout again, e.g. with a higher max_cycles
+        with self.connection:
+            self.connection.execute("UPDATE solutions SET scored = 0")
+        return self.score(max_cycles, processes)
+    
+    def where(self, function=None, max_cost=None, max_area=None, max_cycles=None, inputs=None, outputs=None):
+        # SQL condition and parameters for the filters shared by the queries; function may be a name in gate_functions
+        conditions = ['scored = 1', 'function IS NOT NULL']
+        parameters = []
+        for condition, value in (('function = ?', gate_functions.get(function, function)), ('cost <= ?', max_cost),
+                                 ('area <= ?', max_area), ('cycles <= ?', max_cycles), ('inputs = ?', inputs),
+                                 ('outputs = ?', outputs)):
+            if value is not None:
+                conditions.append(condition)
+                parameters.append(value)
+        return ' AND '.join(conditions), parameters
+    
+    def rows(self, query, parameters):
+        return [{k: row[k] for k in row.keys() if k != 'layout'} for row in self.connection.execute(query, parameters)]
+    
+    def find(self, order_by='cost', limit=None, **filters):
+        """
+        Scored solutions matching filters (function, max_cost, max_area, max_cycles, inputs, outputs; see where()),
+        best first by order_by (one of metrics), ties broken by the other metrics, e.g.:
+            library.find(function='and', max_area=12, limit=1)
+        """
+        if order_by not in metrics:
+            raise ValueError(f"order_by must be one of {metrics}.")
+        condition, parameters = self.where(**filters)
+        order = ', '.join([order_by] + [metric for metric in metrics if metric != order_by])
+        query = f"SELECT * FROM solutions WHERE {condition} ORDER BY {order}"
+        if limit is not None:
+            query += ' LIMIT ?'
+            parameters.append(limit)
+        return self.rows(query, parameters)
+    
+    def pareto(self, metric_names=metrics, **filters):
+        """
+        The Pareto frontier of the scored solutions matching filters over metric_names (any of metrics): those no
+        other solution matches or beats in every metric while beating in one, ordered by the first metric. Solutions
+        with equal metrics are all kept.
+        """
+        if not metric_names or any(metric not in metrics for metric in metric_names):
+            raise ValueError(f"Metrics must be some of {metrics}.")
+        condition, parameters = self.where(**filters)
+        frontier = []
+        for row in self.rows(f"SELECT * FROM solutions WHERE {condition} ORDER BY {', '.join(metric_names)}",
+                             parameters):
+            point = tuple(row[metric] for metric in metric_names)
+            # earlier rows are never worse in the first metric, so only they can dominate this one
+            if not any(all(a <= b for a, b in zip(other, point)) and other != point
+                       for other in (tuple(kept[metric] for metric in metric_names) for kept in frontier)):
+                frontier.append(row)
+        return frontier
+    
+    def histogram(self, metric, width=None, **filters):
+        # [(lowest value of bucket, count)] of a metric over the matching scored solutions, width values per bucket
+        # (default: about 20 buckets over the values present)
+        if metric not in metrics:
+            raise ValueError(f"metric must be one of {metrics}.")
+        condition, parameters = self.where(**filters)
+        low, high = self.connection.execute(f"SELECT MIN({metric}), MAX({metric}) FROM solutions WHERE {condition}",
+                                            parameters).fetchone()
+        if low is None:
+            return []
+        if width is None:
+            width = max(1, -(-(high - low + 1) // 20))
+        return [tuple(row) for row in self.connection.execute(
+            f"SELECT {metric} - ({metric} - ?) % ? AS bucket, COUNT(*) FROM solutions WHERE {condition} "
+            "GROUP BY bucket ORDER BY bucket", [low, width, *parameters])]
+    
+    def layout(self, solution_hash):  # the Layout stored for a hash, e.g. to write_layout() it or place_layout() it
+        row = self.connection.execute("SELECT layout FROM solutions WHERE hash = ?", (solution_hash,)).fetchone()
+        if row is None:
+            raise KeyError(solution_hash)
+        return Layout.from_buffer(bytes(row['layout']))
+    
+    def files(self, solution_hash):  # paths of the scanned files holding a solution
+        return [row['path'] for row in self.connection.execute("SELECT path FROM files WHERE hash = ? ORDER BY path",
+                                                                (solution_hash,))]
+
+
+def main(argv=None):
+    parser = ArgumentParser(description="Catalogue IDEALaser solutions and query them.")
+    parser.add_argument('--database', default=default_database)
+    commands = parser.add_subparsers(dest='command', required=True)
+    scan_parser = commands.add_parser('scan', help="add new and changed solution files")
+    scan_parser.add_argument('folder', nargs='?', default='IDEALaser Saves')
+    score_parser = commands.add_parser('score', help="score the solutions not scored yet")
+    score_parser.add_argument('--max-cycles', type=int, default=10000)
+    score_parser.add_argument('--processes', type=int)
+    score_parser.add_argument('--all', action='store_true', help="score every solution again")
+    query_parsers = [commands.add_parser('find', help="matching solutions, best first"),
+                     commands.add_parser('pareto', help="Pareto frontier of the matching solutions"),
+                     commands.add_parser('histogram', help="distribution of a metric")]
+    query_parsers[0].add_argument('--order-by', choices=metrics, default='cost')
+    query_parsers[0].add_argument('--limit', type=int)
+    query_parsers[1].add_argument('--metrics', nargs='+', choices=metrics, default=list(metrics))
+    query_parsers[2].add_argument('metric', choices=metrics)
+    query_parsers[2].add_argument('--width', type=int)
+    for query_parser in query_parsers:
+        query_parser.add_argument('--function', help=f"truth table, or one of {', '.join(gate_functions)}")
+        for name in 'max_cost', 'max_area', 'max_cycles', 'inputs', 'outputs':
+            query_parser.add_argument(f"--{name.replace('_', '-')}", type=int)
+    args = parser.parse_args(argv)
+    with Library(args.database) as library:
+        if args.command == 'scan':
+            read, errors = library.scan(args.folder)
+            for file_path, message in errors:
+                print(f"{file_path}: {message}")
+            print(f"Read {read} files.")
+        elif args.command == 'score':
+            scored = (library.rescore if args.all else library.score)(args.max_cycles, args.processes)
+            print(f"Scored {scored} solutions.")
+        else:
+            filters = {name: getattr(args, name) for name in
+                       ('function', 'max_cost', 'max_area', 'max_cycles', 'inputs', 'outputs')}
+            if args.command == 'find':
+                results = library.find(args.order_by, args.limit, **filters)
+            elif args.command == 'pareto':
+                results = library.pareto(args.metrics, **filters)
+            else:
+                results = library.histogram(args.metric, args.width, **filters)
+            for result in results:
+                if args.command == 'histogram':
+                    print(f"{result[0]:>8} {result[1]:>8}")
+                else:
+                    table = loads(result.pop('truth_table'))
+                    print(dumps({**result, 'input_coordinates': table['inputs'],
+                                 'output_coordinates': table['outputs'], 'files': library.files(result['hash'])}))
+
+
+if __name__ == '__main__':
+    main()
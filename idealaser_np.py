@@ -0,0 +1,164 @@
+"""
+IDEALaser (Simultaneous Evaluation) NumPy backend
+
+Steps a solution built with idealaser_s.py with the same rules, but stores pulses as 4 boolean planes (one per facing,
+in 'wasd' order) over the edge() bounding box instead of SPulse objects, so every step is a handful of array operations:
+
+1. Redirectors and splitters gather the pulse planes at the coordinates they fire at.
+
+2. Pulses survive on empty tiles inside the board if they are the only pulse on the tile, and in bridges if there is no
+pulse facing the opposite way; everything else (blocks, collisions, pulses that left the board) is masked out.
+
+3. Each plane is shifted one tile in its facing.
+
+4. Generators, active inputs and firing redirectors/splitters set their pulses.
+
+5. Redirectors, splitters and outputs gather their state from the occupied tiles.
+
+Requires NumPy. The layout may not be edited while a NumpySimulation exists (rule 5 in README).
+"""
+import numpy as np
+import idealaser_s
+from idealaser_s import SGenerator, SInput, SRedirector, SSplitter, SOutput, SBridge, StandaloneSimulation, \
+    advance_sequence
+from idealaser_globals import facing_index, facing_offset
+opposite_planes = np.array([2, 3, 0, 1])
+
+
+class NumpySimulation(StandaloneSimulation):
+    """
+    Drop-in replacement for idealaser_s.Simulation, reading blocks from block_coordinates (or the given dict) and
+    starting from the reset state. Does not change the blocks or the globals of idealaser_s.
+    """
+    def __init__(self, blocks=None):
+        if blocks is None:
+            blocks = idealaser_s.block_coordinates
+        max_x, min_x, max_y, min_y = idealaser_s.edge(blocks)
+        self.origin = min_x, min_y
+        shape = max_x - min_x + 1, max_y - min_y + 1
+        block_mask = np.zeros(shape, bool)
+        self.bridge_mask = np.zeros(shape, bool)
+        for (x, y), block in blocks.items():
+            block_mask[x - min_x, y - min_y] = True
+            if type(block) == SBridge:
+                self.bridge_mask[x - min_x, y - min_y] = True
+        interior = np.zeros(shape, bool)
+        interior[1:-1, 1:-1] = True
+        self.empty_mask = interior & ~block_mask
+        
+        # Spawners as parallel index arrays: plane and coordinates of the pulse, and for redirectors/splitters the
+        # coordinates of the block itself and whether the target tile always (block), never (bridge, redirectors
+        # only) or conditionally (no pulse facing back) lets it fire
+        generators = []
+        redirectors = []
+        splitters = []
+        outputs = []
+        self.input_spawns = []
+        self.input_seqs = []
+        self.input_original_states = []
+        for (x, y), block in blocks.items():
+            block_type = type(block)
+            if block_type in (SGenerator, SInput, SRedirector):
+                dx, dy = facing_offset[facing_index[block.facing]]
+                target = x + dx, y + dy
+                spawn = facing_index[block.facing], target[0] - min_x, target[1] - min_y
+                if block_type == SGenerator:
+                    generators.append(spawn)
+                elif block_type == SInput:
+                    self.input_spawns.append(spawn)
+                    self.input_seqs.append(block.seq)
+                    self.input_original_states.append(block.original_state)
+                else:
+                    if target not in blocks:
+                        mode = 2
+                    elif type(blocks[target]) == SBridge:
+                        mode = 0
+                    else:
+                        mode = 1
+                    redirectors.append((*spawn, x - min_x, y - min_y, mode))
+            elif block_type == SSplitter:
+                for plane, (dx, dy) in enumerate(facing_offset):
+                    # Splitters fire into any adjacent block, bridges included (as SSplitter.prestep does)
+                    mode = 1 if (x + dx, y + dy) in blocks else 2
+                    splitters.append((plane, x + dx - min_x, y + dy - min_y, x - min_x, y - min_y, mode))
+            elif block_type == SOutput:
+                outputs.append((x - min_x, y - min_y))
+        self.generators = tuple(np.array(column, int) for column in zip(*generators)) if generators else None
+        self.redirectors = [np.array(column, int) for column in zip(*redirectors)] if redirectors else None
+        self.splitters = [np.array(column, int) for column in zip(*splitters)] if splitters else None
+        self.output_coordinates = [(x + min_x, y + min_y) for x, y in outputs]
+        self.output_index = tuple(np.array(column, int) for column in zip(*outputs)) if outputs else None
+        self.planes = np.zeros((4, *shape), bool)
+        self.occupied = np.zeros(shape, bool)
+        self.cycle_count = 0
+        self.reset()
+    
+    @property
+    def cycle(self):
+        return self.cycle_count
+    
+    def reset(self):
+        self.cycle_count = 0
+        self.planes[:] = False
+        self.occupied[:] = False
+        self.input_states = list(self.input_original_states)
+        self.input_seq_indices = [0] * len(self.input_states)
+        self.input_seq_counts = [0] * len(self.input_states)
+    
+    def outputs(self):
+        if self.output_index is None:
+            return {}
+        return dict(zip(self.output_coordinates, self.occupied[self.output_index].tolist()))
+    
+    def state_key(self):
+        return self.planes.tobytes(), tuple(self.input_states), tuple(self.input_seq_indices), \
+            tuple(self.input_seq_counts)
+    
+    def is_deterministic(self):
+        return not any(0 in seq for seq in self.input_seqs)
+    
+    def pulses(self):
+        min_x, min_y = self.origin
+        return {((int(x) + min_x, int(y) + min_y), 'wasd'[plane]) for plane, x, y in zip(*np.nonzero(self.planes))}
+    
+    def step(self):
+        planes = self.planes
+        # Step 1
+        redirector_fire = splitter_fire = None
+        if self.redirectors is not None:
+            plane, tx, ty, x, y, mode = self.redirectors
+            redirector_fire = self.occupied[x, y] & (
+                (mode == 1) | ((mode == 2) & ~planes[opposite_planes[plane], tx, ty]))
+        if self.splitters is not None:
+            plane, tx, ty, x, y, mode = self.splitters
+            splitter_fire = self.occupied[x, y] & ((mode == 1) | ~planes[opposite_planes[plane], tx, ty])
+        # Step 2
+        planes &= (self.empty_mask & (planes.sum(axis=0) == 1)) | (self.bridge_mask & ~planes[opposite_planes])
+        # Step 3
+        planes[0, :, 1:] = planes[0, :, :-1]
+        planes[0, :, 0] = False
+        planes[1, :-1, :] = planes[1, 1:, :]
+        planes[1, -1, :] = False
+        planes[2, :, :-1] = planes[2, :, 1:]
+        planes[2, :, -1] = False
+        planes[3, 1:, :] = planes[3, :-1, :]
+        planes[3, 0, :] = False
+        # Step 4
+        if self.generators is not None:
+            planes[self.generators] = True
+        if redirector_fire is not None:
+            plane, tx, ty = self.redirectors[:3]
+            planes[plane[redirector_fire], tx[redirector_fire], ty[redirector_fire]] = True
+        if splitter_fire is not None:
+            plane, tx, ty = self.splitters[:3]
+            planes[plane[splitter_fire], tx[splitter_fire], ty[splitter_fire]] = True
+        for i, seq in enumerate(self.input_seqs):  # same order as SInput.step calls, so random() is called alike
+            if self.input_states[i]:
+                planes[self.input_spawns[i]] = True
+            if seq:
+                self.input_states[i], self.input_seq_indices[i], self.input_seq_counts[i] = advance_sequence(
+                    seq, self.input_states[i], self.input_seq_indices[i], self.input_seq_counts[i])
+        # Step 5
+        np.any(planes, axis=0, out=self.occupied)
+        self.cycle_count += 1
+
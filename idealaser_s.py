@@ -29,18 +29,36 @@ correspondingly.
 # todo add new block, dual-split, which splits only in either horizontal or vertical axis; don't add new generators like
 #  double-sided generator, use these blocks to split them
 from os import mkdir, path, listdir
-from pickle import dump, load
-from random import random
+from shutil import get_terminal_size
+import sys
+from pickle import Unpickler, UnpicklingError
+from random import random, getstate, setstate
 from math import e
-from idealaser_globals import facing_dict, opposite_face_dict, cost_dict
+from array import array
+from bisect import bisect_left, bisect_right
+from zlib import compress, decompress
+from asyncio import sleep
+from threading import Thread, Lock, Event
+from time import monotonic
+from idealaser_layout import Layout, read_layout, write_layout
+from idealaser_globals import facing_dict, opposite_face_dict, facing_index, facing_offset, facing_offset_dict, \
+    cost_dict, BlockDict
+
+
+facing_strings = [''.join(facing for i, facing in enumerate('wasd') if mask >> i & 1) for mask in range(16)]
+opposite_bits = 4, 8, 1, 2  # facing bit of the opposite of each facing, in 'wasd' order
+warm = False  # 'warm' command: keep the simulation between runs, and apply edits to it (see Simulation.edit())
+warm_simulation = None
+save_folder = path.join('IDEALaser Saves', 'Simultaneous Saves')
+save_extensions = '.ilt', '.ilb', '.pickle'  # text and binary layouts (idealaser_layout.py), and old pickled saves
 
 
 def init_globals():
     # block_coordinates = {}
-    # pulse_list = []
-    # pulse_coordinates = {}
+    # pulse_list = PulseList()
+    # pulse_coordinates = PulseGrid()
     # cycle_count = 0
-    return {}, [], {}, 0  # must be assigned to variable names as above
+    return BlockDict(), PulseList(), PulseGrid(), 0  # must be assigned to variable names as above
 
 
 def make_folders():
@@ -49,49 +67,185 @@ def make_folders():
     except FileExistsError:
         pass
     try:
-        mkdir('IDEALaser Saves/Simultaneous Saves')
+        mkdir(save_folder)
     except FileExistsError:
         pass
 
 
-class SPulse:
-    def __init__(self, x, y, direction):  # direction = wasd
-        self.coordinates = x, y
-        self.facing = direction
-        pulse_list.append(self)
-        if self.coordinates in pulse_coordinates:
-            pulse_coordinates[self.coordinates].append(self.facing)
-        else:
-            pulse_coordinates[self.coordinates] = [self.facing]
+class SaveUnpickler(Unpickler):
+    """
+    Reads pickled saves. Their blocks are named after the module the game ran as (usually __main__), so both that and
+    idealaser_s are read as this module, whatever name it was imported under.
+    """
+    def find_class(self, module, name):
+        if module in ('__main__', 'idealaser_s'):
+            module = __name__
+        return super().find_class(module, name)
+
+
+def load_pickled_blocks(file_path):  # BlockDict of a pickled save; raises ValueError if it cannot be read
+    try:
+        with open(file_path, 'rb') as f:
+            return BlockDict(SaveUnpickler(f).load())
+    except (UnpicklingError, AttributeError, ImportError, EOFError, TypeError) as error:
+        raise ValueError(f"Not a readable save ({error}).") from None
+
+
+def advance_sequence(seq, state, seq_index, seq_count):
+    # Returns (state, seq_index, seq_count) of an oscillating input after 1 cycle; a 0 in seq toggles at random
+    seq_count += 1
+    if (seq[seq_index] == 0 and random() < 1 / e) or seq_count == seq[seq_index]:
+        state = not state
+        seq_count = 0
+        seq_index += 1
+        if seq_index == len(seq):
+            seq_index = 0
+    return state, seq_index, seq_count
+
+
+class PulseList:
+    """
+    The live pulses (pulse_list), as parallel x, y and facing (index into 'wasd') arrays instead of one object per
+    pulse. Simulation.step() writes the surviving pulses into the spare arrays, then swaps them in with swap(); as count
+    says how much of the arrays is in use, they are only ever grown, and no memory is allocated per cycle.
+    """
+    def __init__(self):
+        self.x, self.y, self.facing = array('i'), array('i'), array('b')
+        self.next_x, self.next_y, self.next_facing = array('i'), array('i'), array('b')
+        self.count = 0
+    
+    def __len__(self):
+        return self.count
+    
+    def __iter__(self):  # ((x, y), facing) of each pulse
+        for i in range(self.count):
+            yield (self.x[i], self.y[i]), 'wasd'[self.facing[i]]
     
     def __repr__(self):
-        return f'Pulse{*self.coordinates, self.facing}'
+        return f"[{', '.join(f'Pulse{*k, facing}' for k, facing in self)}]"
     
-    def step(self):
-        # Remove old entry in coordinates dict
-        pulse_coordinates[self.coordinates].remove(self.facing)
-        if not pulse_coordinates[self.coordinates]:
-            del pulse_coordinates[self.coordinates]  # remove key if it has no values, i.e. coordinate has no pulses
-        # Update coordinates
-        if self.facing == 'w':
-            self.coordinates = self.coordinates[0], self.coordinates[1] + 1
-        elif self.facing == 'a':
-            self.coordinates = self.coordinates[0] - 1, self.coordinates[1]
-        elif self.facing == 's':
-            self.coordinates = self.coordinates[0], self.coordinates[1] - 1
-        else:  # self.facing == 'd'
-            self.coordinates = self.coordinates[0] + 1, self.coordinates[1]
-        # Add new entry in coordinates dict
-        if self.coordinates in pulse_coordinates:
-            pulse_coordinates[self.coordinates].append(self.facing)
+    def append(self, x, y, facing):
+        if self.count < len(self.x):
+            self.x[self.count], self.y[self.count], self.facing[self.count] = x, y, facing_index[facing]
         else:
-            pulse_coordinates[self.coordinates] = [self.facing]
+            self.x.append(x)
+            self.y.append(y)
+            self.facing.append(facing_index[facing])
+        self.count += 1
+    
+    def swap(self, count):  # the spare arrays, holding count pulses, become the live ones
+        self.x, self.next_x = self.next_x, self.x
+        self.y, self.next_y = self.next_y, self.y
+        self.facing, self.next_facing = self.next_facing, self.facing
+        self.count = count
+    
+    def clear(self):
+        self.count = 0
+
+
+class PulseGrid:
+    """
+    Which pulses are on each tile (pulse_coordinates), as a bytearray of facing bits ('wasd' = 1, 2, 4, 8) over the
+    edge() box, set up by resize() when a Simulation is compiled. Reads like the dict of facing lists it replaces:
+    (x, y) in pulse_coordinates is True if there is a pulse on the tile, and pulse_coordinates[x, y] gives the facings
+    of its pulses as a string ('' if there are none), e.g. 'wd'.
+    """
+    def __init__(self):
+        self.resize((-1, 0, -1, 0))
+    
+    def resize(self, edges):  # edges as returned by edge(); clears the grid
+        max_x, min_x, max_y, min_y = edges
+        self.origin = min_x, min_y
+        self.width = max_x - min_x + 1
+        self.height = max_y - min_y + 1
+        self.masks = bytearray(self.width * self.height)
+        self.next_masks = bytearray(self.width * self.height)
+        self.blank = bytes(self.width * self.height)
+    
+    def index(self, coordinates):  # index of the tile in masks, or -1 if it is outside the grid
+        x, y = coordinates[0] - self.origin[0], coordinates[1] - self.origin[1]
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return x + y * self.width
+        return -1
+    
+    def __contains__(self, coordinates):
+        index = self.index(coordinates)
+        return index >= 0 and self.masks[index] != 0
+    
+    def __getitem__(self, coordinates):
+        index = self.index(coordinates)
+        return facing_strings[self.masks[index]] if index >= 0 else ''
+    
+    def add(self, x, y, facing):
+        self.masks[self.index((x, y))] |= 1 << facing_index[facing]
+    
+    def swap(self):  # next_masks become the live masks, and the old ones are cleared to be reused
+        self.masks, self.next_masks = self.next_masks, self.masks
+        self.next_masks[:] = self.blank
+    
+    def clear(self):
+        self.masks[:] = self.blank
+
+
+class World:
+    """
+    The state of one solution: its blocks (block_coordinates), live pulses (pulse_list and pulse_coordinates) and
+    cycle_count, as init_globals() gives them. Blocks are bound to the world they are created with, and a Simulation
+    steps the world it is given, so separate worlds can be built and run side by side, e.g. one per thread:
+        world = World()
+        SGenerator(0, 0, 'd', world=world)
+        SOutput(3, 0, world=world)
+        Simulation(world).run(10)
+    The other backends (e.g. BitboardSimulation) take world.block_coordinates as their blocks.
+    """
+    def __init__(self):
+        self.block_coordinates, self.pulse_list, self.pulse_coordinates, self.cycle_count = init_globals()
+    
+    def __repr__(self):
+        return f'{type(self).__name__}(blocks={len(self.block_coordinates)}, cycle={self.cycle_count})'
+    
+    def add_pulse(self, x, y, facing):
+        self.pulse_list.append(x, y, facing)
+        self.pulse_coordinates.add(x, y, facing)
+
+
+def module_global(name):  # property reading and assigning the module global name
+    return property(lambda self: globals()[name], lambda self, value: globals().__setitem__(name, value))
+
+
+class ModuleWorld(World):
+    """
+    The module globals as a World. Blocks and Simulations created without a world use it, so code assigning
+    init_globals() to the globals (see the README), and the menus of this module, keep working.
+    """
+    block_coordinates = module_global('block_coordinates')
+    pulse_list = module_global('pulse_list')
+    pulse_coordinates = module_global('pulse_coordinates')
+    cycle_count = module_global('cycle_count')
+    
+    def __init__(self):
+        pass  # the globals are assigned by whoever uses them
+
+
+default_world = ModuleWorld()
 
 
 class SBlock:
-    def __init__(self, x, y):
+    world = default_world  # replaced on blocks created with a world
+    
+    def __init__(self, x, y, world=None):
         self.coordinates = x, y
-        block_coordinates[self.coordinates] = self
+        if world is not None:
+            self.world = world
+        self.world.block_coordinates[self.coordinates] = self
+    
+    def __getstate__(self):  # saves and copies of a block leave its world behind, and are bound to default_world
+        state = self.__dict__.copy()
+        state.pop('world', None)
+        return state
+    
+    def compile(self):  # called by Simulation before running, to precompute anything that depends on other blocks
+        pass
     
     def prestep(self):
         pass
@@ -104,28 +258,25 @@ class SBlock:
 
 
 class SGenerator(SBlock):
-    def __init__(self, x, y, direction):
-        super().__init__(x, y)
+    def __init__(self, x, y, direction, world=None):
+        super().__init__(x, y, world)
         self.facing = direction
         self.cost = cost_dict['g']
     
     def __repr__(self):
         return f'Generator{*self.coordinates, self.facing}'
     
+    def compile(self):
+        dx, dy = facing_offset_dict[self.facing]
+        self.next_coordinates = self.coordinates[0] + dx, self.coordinates[1] + dy
+    
     def step(self):
-        if self.facing == 'w':
-            SPulse(self.coordinates[0], self.coordinates[1] + 1, self.facing)
-        elif self.facing == 'a':
-            SPulse(self.coordinates[0] - 1, self.coordinates[1], self.facing)
-        elif self.facing == 's':
-            SPulse(self.coordinates[0], self.coordinates[1] - 1, self.facing)
-        else:
-            SPulse(self.coordinates[0] + 1, self.coordinates[1], self.facing)
+        self.world.add_pulse(*self.next_coordinates, self.facing)
 
 
 class SInput(SBlock):
-    def __init__(self, x, y, direction, level, sequence):
-        super().__init__(x, y)
+    def __init__(self, x, y, direction, level, sequence, world=None):
+        super().__init__(x, y, world)
         self.facing = direction
         if level == 't':
             self.original_state = True
@@ -140,29 +291,21 @@ class SInput(SBlock):
     def __repr__(self):
         return f'Input{*self.coordinates, self.facing, self.original_state, self.seq}'
     
+    def compile(self):
+        dx, dy = facing_offset_dict[self.facing]
+        self.next_coordinates = self.coordinates[0] + dx, self.coordinates[1] + dy
+    
     def step(self):
         if self.state:
-            if self.facing == 'w':
-                SPulse(self.coordinates[0], self.coordinates[1] + 1, self.facing)
-            elif self.facing == 'a':
-                SPulse(self.coordinates[0] - 1, self.coordinates[1], self.facing)
-            elif self.facing == 's':
-                SPulse(self.coordinates[0], self.coordinates[1] - 1, self.facing)
-            else:  # 'd'
-                SPulse(self.coordinates[0] + 1, self.coordinates[1], self.facing)
+            self.world.add_pulse(*self.next_coordinates, self.facing)
         if self.seq:
-            self.seq_count += 1
-            if (self.seq[self.seq_index] == 0 and random() < 1 / e) or self.seq_count == self.seq[self.seq_index]:
-                self.state = not self.state
-                self.seq_count = 0
-                self.seq_index += 1
-                if self.seq_index == len(self.seq):
-                    self.seq_index = 0
+            self.state, self.seq_index, self.seq_count = advance_sequence(
+                self.seq, self.state, self.seq_index, self.seq_count)
 
 
 class SRedirector(SBlock):
-    def __init__(self, x, y, direction):
-        super().__init__(x, y)
+    def __init__(self, x, y, direction, world=None):
+        super().__init__(x, y, world)
         self.facing = direction
         self.state = False
         self.fire = False
@@ -179,33 +322,35 @@ class SRedirector(SBlock):
     def __repr__(self):
         return f'Redirector{*self.coordinates, self.facing}'
     
+    def compile(self):
+        # fire_mode True: always fires (into a block), False: never fires (into a bridge), None: fires unless a pulse
+        # at next_coordinates faces back at it
+        blocks = self.world.block_coordinates
+        if self.next_coordinates in blocks:
+            self.fire_mode = type(blocks[self.next_coordinates]) != SBridge
+        else:
+            self.fire_mode = None
+        self.opposite = opposite_face_dict[self.facing]
+    
     def prestep(self):
-        self.fire = False
-        if self.state:
-            if self.next_coordinates in block_coordinates:
-                if type(block_coordinates[self.next_coordinates]) != SBridge:
-                    self.fire = True
-            else:
-                if self.next_coordinates in pulse_coordinates:
-                    if opposite_face_dict[self.facing] not in pulse_coordinates[self.next_coordinates]:
-                        self.fire = True
-                else:
-                    self.fire = True
+        if not self.state:
+            self.fire = False
+        elif self.fire_mode is None:
+            self.fire = self.opposite not in self.world.pulse_coordinates[self.next_coordinates]
+        else:
+            self.fire = self.fire_mode
     
     def step(self):
         if self.fire:
-            SPulse(*self.next_coordinates, self.facing)
+            self.world.add_pulse(*self.next_coordinates, self.facing)
     
     def poststep(self):
-        if self.coordinates in pulse_coordinates:
-            self.state = True
-        else:
-            self.state = False
+        self.state = self.coordinates in self.world.pulse_coordinates
 
 
 class SSplitter(SBlock):
-    def __init__(self, x, y):
-        super().__init__(x, y)
+    def __init__(self, x, y, world=None):
+        super().__init__(x, y, world)
         self.w = x, y + 1
         self.a = x - 1, y
         self.s = x, y - 1
@@ -219,38 +364,32 @@ class SSplitter(SBlock):
     def __repr__(self):
         return f'Splitter{self.coordinates}'
     
+    def compile(self):
+        # (coordinates, opposite facing, whether it always fires there) for each direction; splitters always fire into
+        # adjacent blocks, bridges included
+        self.fire_checks = tuple((coordinates, opposite_face_dict[facing], coordinates in self.world.block_coordinates)
+                                 for facing, coordinates in self.reference)
+    
     def prestep(self):
-        self.fire_list = [False, False, False, False]
         if self.state:
-            for i in 0, 1, 2, 3:
-                if self.next_coordinates[i] in block_coordinates:
-                    if block_coordinates[self.next_coordinates[i]] != SBridge:
-                        self.fire_list[i] = True
-                else:
-                    pass
-            for i in 0, 1, 2, 3:
-                if not self.fire_list[i]:
-                    if self.reference[i][1] in pulse_coordinates:
-                        if opposite_face_dict[self.reference[i][0]] not in pulse_coordinates[self.reference[i][1]]:
-                            self.fire_list[i] = True
-                    else:
-                        self.fire_list[i] = True
+            pulse_coordinates = self.world.pulse_coordinates
+            self.fire_list = [always or opposite not in pulse_coordinates[coordinates]
+                              for coordinates, opposite, always in self.fire_checks]
+        else:
+            self.fire_list = [False, False, False, False]
     
     def step(self):
         for i in 0, 1, 2, 3:
             if self.fire_list[i]:
-                SPulse(*self.reference[i][1], self.reference[i][0])
+                self.world.add_pulse(*self.reference[i][1], self.reference[i][0])
     
     def poststep(self):
-        if self.coordinates in pulse_coordinates:
-            self.state = True
-        else:
-            self.state = False
+        self.state = self.coordinates in self.world.pulse_coordinates
 
 
 class SOutput(SBlock):
-    def __init__(self, x, y):
-        super().__init__(x, y)
+    def __init__(self, x, y, world=None):
+        super().__init__(x, y, world)
         self.state = False
         self.cost = cost_dict['o']
     
@@ -258,15 +397,12 @@ class SOutput(SBlock):
         return f'Output{self.coordinates}'
     
     def poststep(self):
-        if self.coordinates in pulse_coordinates:
-            self.state = True
-        else:
-            self.state = False
+        self.state = self.coordinates in self.world.pulse_coordinates
 
 
 class SBlocker(SBlock):
-    def __init__(self, x, y):
-        super().__init__(x, y)
+    def __init__(self, x, y, world=None):
+        super().__init__(x, y, world)
         self.cost = cost_dict['l']
     
     def __repr__(self):
@@ -274,19 +410,27 @@ class SBlocker(SBlock):
 
 
 class SBridge(SBlock):
-    def __init__(self, x, y):
-        super().__init__(x, y)
+    def __init__(self, x, y, world=None):
+        super().__init__(x, y, world)
         self.cost = cost_dict['b']
     
     def __repr__(self):
         return f'Bridge{self.coordinates}'
 
 
-def edge():
-    global block_coordinates
-    temp_block_x = []
+block_classes = {'g': SGenerator, 'r': SRedirector, 'p': SSplitter, 'l': SBlocker, 'b': SBridge, 'i': SInput,
+                 'o': SOutput}  # by block ID, as in 'help1'
+block_class_ids = {block_class: block_id for block_id, block_class in block_classes.items()}
+
+
+def edge(blocks=None):  # blocks defaults to block_coordinates
+    if blocks is None:
+        blocks = block_coordinates
+    if type(blocks) == BlockDict:
+        return blocks.edge()
+    temp_block_x = []  # plain dicts have no column/row counts, so every block is scanned
     temp_block_y = []
-    for block in block_coordinates.keys():
+    for block in blocks.keys():
         temp_block_x.append(block[0])
         temp_block_y.append(block[1])
     max_x = max(temp_block_x) + 1
@@ -296,146 +440,746 @@ def edge():
     return max_x, min_x, max_y, min_y
 
 
-def tile_print():
-    global pulse_list
-    global pulse_coordinates
-    global cycle_count
-    cost_sum = 0
-    for block in block_coordinates.values():
-        cost_sum += block.cost
-    print(f"Cost: {cost_sum}")
-    print(f"Cycles: {cycle_count}")
+def xor_bytes(a, b):  # a XOR b, both of the same length
+    return (int.from_bytes(a, 'little') ^ int.from_bytes(b, 'little')).to_bytes(len(a), 'little')
+
+
+class Checkpoints:
+    """
+    Snapshots (see Simulation.snapshot()) taken every interval cycles, for Simulation.seek(). The pulse grid of each is
+    stored zlib compressed, and as its XOR with the one before (mostly zeros, as few tiles change between checkpoints),
+    except every keyframe-th one. Once there are more than budget of them, every other one is dropped and interval
+    doubles, so they keep spanning the whole run in bounded memory.
+    """
+    keyframe = 16
+    
+    def __init__(self, interval, budget):
+        self.interval = interval
+        self.budget = max(2, budget)
+        self.cycles = []  # ascending
+        self.entries = []  # (edges, compressed grid or XOR with the one before, whether it is an XOR, other states)
+        self.last_masks = None  # uncompressed grid of the last entry
+    
+    def __len__(self):
+        return len(self.cycles)
+    
+    def add(self, snapshot):  # snapshot must be of a later cycle than the last one
+        cycle, edges, masks, states, random_state = snapshot
+        delta = len(self.entries) % self.keyframe != 0 and self.entries[-1][0] == edges
+        self.cycles.append(cycle)
+        self.entries.append((edges, compress(xor_bytes(masks, self.last_masks) if delta else masks, 1), delta,
+                             (states, random_state)))
+        self.last_masks = masks
+        if len(self.cycles) > self.budget:
+            self.thin()
+    
+    def snapshots(self, start=0):  # the snapshots from index start onwards, decoded one by one
+        i = start
+        while i > 0 and self.entries[i][2]:
+            i -= 1
+        masks = None
+        for i in range(i, len(self.entries)):
+            edges, data, delta, (states, random_state) = self.entries[i]
+            masks = xor_bytes(decompress(data), masks) if delta else decompress(data)
+            if i >= start:
+                yield self.cycles[i], edges, masks, states, random_state
+    
+    def thin(self):
+        self.interval *= 2
+        kept = [snapshot for i, snapshot in enumerate(self.snapshots()) if i == 0 or snapshot[0] % self.interval == 0]
+        self.truncate(0)
+        for snapshot in kept:
+            self.add(snapshot)
+    
+    def truncate(self, start):  # drops the snapshots from index start onwards
+        del self.cycles[start:], self.entries[start:]
+        self.last_masks = next(self.snapshots(start - 1))[2] if start else None
+    
+    def last_at(self, cycle):  # index of the last snapshot at or before cycle, or None
+        i = bisect_right(self.cycles, cycle)
+        return i - 1 if i else None
+    
+    def after_step(self, simulation):
+        # Takes a snapshot if the cycle is due one; after stepping from an earlier snapshot, the later ones stay if the
+        # solution is deterministic (it will come out the same), else they are dropped as a new history starts
+        cycle = simulation.cycle
+        if cycle % self.interval:
+            return
+        i = bisect_left(self.cycles, cycle)
+        if i < len(self.cycles):
+            if simulation.is_deterministic():
+                return
+            self.truncate(i)
+        self.add(simulation.snapshot())
+
+
+class Simulation:
+    """
+    Headless stepper for a solution: runs evaluation steps 1-5 (see module docstring) without input() prompts or
+    tile_print() rendering. Steps the given World, or by default the globals run_solution() uses (default_world), in
+    which case init_globals() must be assigned first. The blocks are compiled when it is created, so after editing
+    blocks, call edit() for each edited tile, compile(), or create a new Simulation.
+    """
+    transient = period = None  # set by find_cycle()
+    checkpoints = None  # set by keep_checkpoints()
+    
+    def __init__(self, world=None):
+        self.world = default_world if world is None else world
+        self.compile()
+    
+    def __repr__(self):
+        return f'{type(self).__name__}(cycle={self.cycle})'
+    
+    @property
+    def cycle(self):
+        return self.world.cycle_count
+    
+    def outputs(self):
+        return output_states(self.world.block_coordinates)
+    
+    def pulses(self):
+        return set(self.world.pulse_list)
+    
+    def pulse_count(self):
+        return len(self.pulses())
+    
+    def compile(self):
+        # Lists the blocks which do something in each phase, so steps skip the no-op calls, has every block precompute
+        # what it needs from its neighbours, and fits pulse_coordinates to the board
+        world = self.world
+        pulse_coordinates = world.pulse_coordinates
+        pulses = list(world.pulse_list)
+        world.pulse_list.clear()
+        self.edges = edge(world.block_coordinates)
+        pulse_coordinates.resize(self.edges)
+        for k, facing in pulses:
+            if pulse_coordinates.index(k) >= 0:
+                world.add_pulse(*k, facing)
+        # Kind of each tile of pulse_coordinates: 0 empty, 1 off the board, 2 block, 3 bridge
+        self.tile_kinds = bytearray([1]) * len(pulse_coordinates.masks)
+        for y in range(1, pulse_coordinates.height - 1):
+            start = y * pulse_coordinates.width
+            self.tile_kinds[start + 1:start + pulse_coordinates.width - 1] = bytes(pulse_coordinates.width - 2)
+        self.prestep_blocks = []  # only redirectors and splitters
+        self.step_blocks = []  # only redirectors, splitters, generators and inputs
+        self.poststep_blocks = []  # only redirectors, splitters and outputs
+        for k, block in world.block_coordinates.items():
+            block.compile()
+            block_type = type(block)
+            self.tile_kinds[pulse_coordinates.index(k)] = 3 if block_type == SBridge else 2
+            if block_type.prestep is not SBlock.prestep:
+                self.prestep_blocks.append(block)
+            if block_type.step is not SBlock.step:
+                self.step_blocks.append(block)
+            if block_type.poststep is not SBlock.poststep:
+                self.poststep_blocks.append(block)
+    
+    def edit(self, coordinates):
+        """
+        Updates the compiled board after the block at coordinates was added, deleted, replaced or toggled, keeping the
+        pulses and the states of all other blocks instead of resetting. Only the tile and the blocks next to it (whose
+        firing depends on it) are compiled again, unless the edit moved the edge of the board, which needs compile().
+        """
+        self.transient = self.period = None
+        block_coordinates, pulse_coordinates = self.world.block_coordinates, self.world.pulse_coordinates
+        if edge(block_coordinates) != self.edges:
+            self.compile()
+        else:
+            block = block_coordinates.get(coordinates)
+            if block is None:
+                self.tile_kinds[pulse_coordinates.index(coordinates)] = 0
+            else:
+                self.tile_kinds[pulse_coordinates.index(coordinates)] = 3 if type(block) == SBridge else 2
+            # The phase lists keep the order of block_coordinates (a new block is last in both), as compile() would
+            for blocks, phase in (self.prestep_blocks, 'prestep'), (self.step_blocks, 'step'), \
+                    (self.poststep_blocks, 'poststep'):
+                old = next((i for i, other in enumerate(blocks) if other.coordinates == coordinates), None)
+                if old is not None and blocks[old] is not block:
+                    del blocks[old]
+                    old = None
+                if old is None and block is not None and getattr(type(block), phase) is not getattr(SBlock, phase):
+                    blocks.append(block)
+            x, y = coordinates
+            for k in coordinates, (x, y + 1), (x - 1, y), (x, y - 1), (x + 1, y):
+                if k in block_coordinates:
+                    block_coordinates[k].compile()
+        if self.checkpoints is not None:  # they were of another board
+            self.keep_checkpoints(self.checkpoints.interval, self.checkpoints.budget)
+    
+    def step(self):
+        pulse_list, pulse_coordinates = self.world.pulse_list, self.world.pulse_coordinates
+        # Step 1
+        for block in self.prestep_blocks:
+            block.prestep()
+        # Step 2 and 3: pulses which are not colliding are advanced straight into the spare buffers
+        masks, next_masks, tile_kinds = pulse_coordinates.masks, pulse_coordinates.next_masks, self.tile_kinds
+        min_x, min_y = pulse_coordinates.origin
+        width = pulse_coordinates.width
+        tile_offsets = width, -1, -width, 1
+        xs, ys, facings = pulse_list.x, pulse_list.y, pulse_list.facing
+        next_xs, next_ys, next_facings = pulse_list.next_x, pulse_list.next_y, pulse_list.next_facing
+        capacity = len(next_xs)
+        count = 0
+        for i in range(pulse_list.count):
+            x, y, facing = xs[i], ys[i], facings[i]
+            tile = x - min_x + (y - min_y) * width
+            bit = 1 << facing
+            if tile_kinds[tile] == 3:  # bridge: pulses pass, unless there is a head-on collision
+                if masks[tile] & opposite_bits[facing]:
+                    continue
+            elif tile_kinds[tile] != 0 or masks[tile] != bit:  # block, off the board, or not the only pulse on the tile
+                continue
+            dx, dy = facing_offset[facing]
+            if count < capacity:
+                next_xs[count], next_ys[count], next_facings[count] = x + dx, y + dy, facing
+            else:
+                next_xs.append(x + dx)
+                next_ys.append(y + dy)
+                next_facings.append(facing)
+            count += 1
+            next_masks[tile + tile_offsets[facing]] |= bit
+        pulse_list.swap(count)
+        pulse_coordinates.swap()
+        # Step 4
+        for block in self.step_blocks:
+            block.step()
+        # Step 5
+        for block in self.poststep_blocks:
+            block.poststep()
+        self.world.cycle_count += 1
+        if self.checkpoints is not None:
+            self.checkpoints.after_step(self)
+    
+    def run(self, cycles):
+        for _ in range(cycles):
+            self.step()
+        return self.outputs()
+    
+    def iter_cycles(self, cycles=None, pulse_counts=False):
+        """
+        Steps as the caller asks for more (cycles times, or forever if None) and yields (cycle, output states, number
+        of pulses or None unless pulse_counts) after each step. Nothing is kept between records, so any number of
+        cycles can be streamed, e.g. the first cycle output (5, 3) is on:
+            next(cycle for cycle, outputs, _ in simulation.iter_cycles() if outputs[5, 3])
+        """
+        stop = None if cycles is None else self.cycle + cycles
+        while stop is None or self.cycle < stop:
+            self.step()
+            yield self.cycle, self.outputs(), self.pulse_count() if pulse_counts else None
+    
+    async def async_cycles(self, cycles=None, pulse_counts=False):
+        # iter_cycles() as an async generator, giving other tasks a turn after every cycle (for asyncio consumers)
+        for record in self.iter_cycles(cycles, pulse_counts):
+            yield record
+            await sleep(0)
+    
+    def run_until(self, predicate, max_cycles=None):
+        # predicate is called with this simulation before every step; returns the cycle it became true, or None if
+        # max_cycles steps were made without it becoming true
+        steps = 0
+        while not predicate(self):
+            if max_cycles is not None and steps >= max_cycles:
+                return None
+            self.step()
+            steps += 1
+        return self.cycle
+    
+    def state_key(self):
+        # Everything later cycles depend on (pulses, redirector/splitter states, input sequence positions), hashable
+        block_states = []
+        input_states = []
+        for block in self.world.block_coordinates.values():
+            if type(block) in (SRedirector, SSplitter):
+                block_states.append(block.state)
+            elif type(block) == SInput:
+                input_states.append((block.state, block.seq_index, block.seq_count))
+        return frozenset(self.pulses()), tuple(block_states), tuple(input_states)
+    
+    def is_deterministic(self):  # False if an input has a random (0) entry in its sequence
+        for block in self.world.block_coordinates.values():
+            if type(block) == SInput and 0 in block.seq:
+                return False
+        return True
+    
+    def find_cycle(self, max_cycles=None):
+        """
+        Steps until the state repeats, and returns (transient, period): the first cycle of the repeating part, and its
+        length (1 for a steady state). Returns None if max_cycles steps were made without a repeat. Afterwards,
+        outputs_at() and limit_outputs() give output states at any cycle from the current one onwards.
+        """
+        if not self.is_deterministic():
+            raise ValueError("Inputs with random (0) sequence entries never settle into a cycle.")
+        seen = {self.state_key(): self.cycle}
+        self.history_start = self.cycle
+        self.output_history = []
+        self.transient = self.period = None
+        while True:
+            self.output_history.append(self.outputs())
+            if max_cycles is not None and len(self.output_history) > max_cycles:
+                return None
+            self.step()
+            key = self.state_key()
+            if key in seen:
+                self.transient = seen[key]
+                self.period = self.cycle - self.transient
+                return self.transient, self.period
+            seen[key] = self.cycle
+    
+    def outputs_at(self, cycle):  # output states at any cycle, after find_cycle() found one
+        if self.period is None or cycle < self.history_start:
+            raise ValueError("No cycle found covering that cycle, use find_cycle() first.")
+        if cycle >= self.transient:
+            cycle = self.transient + (cycle - self.transient) % self.period
+        return self.output_history[cycle - self.history_start]
+    
+    def limit_outputs(self):
+        # state of each output at infinity, after find_cycle() found one: True/False, or None if it keeps changing
+        limit = {}
+        for states in self.output_history[self.transient - self.history_start:]:
+            for k, v in states.items():
+                if k not in limit:
+                    limit[k] = v
+                elif limit[k] != v:
+                    limit[k] = None
+        return limit
+    
+    def keep_checkpoints(self, interval=100, budget=64):
+        """
+        Takes a snapshot now and every interval cycles from now on, keeping at most budget of them (see Checkpoints),
+        so that seek() can go back to any earlier cycle.
+        """
+        self.checkpoints = Checkpoints(interval, budget)
+        self.checkpoints.add(self.snapshot())
+    
+    def snapshot(self):
+        """
+        The state of the run, which restore() goes back to: (cycle, edges, pulse grid as bytes, states of the
+        redirectors, splitters, outputs and inputs in block order, random state if any input is random, else None).
+        """
+        states = []
+        for block in self.world.block_coordinates.values():
+            block_type = type(block)
+            if block_type == SInput:
+                states.append((block.state, block.seq_index, block.seq_count))
+            elif block_type in (SRedirector, SSplitter, SOutput):
+                states.append(block.state)
+        return self.cycle, self.edges, bytes(self.world.pulse_coordinates.masks), tuple(states), \
+            None if self.is_deterministic() else getstate()
+    
+    def restore(self, snapshot):
+        cycle, edges, masks, states, random_state = snapshot
+        if edges != self.edges:
+            raise ValueError("The snapshot was taken of a different board.")
+        world = self.world
+        pulse_coordinates = world.pulse_coordinates
+        pulse_coordinates.masks[:] = masks
+        world.pulse_list.clear()
+        min_x, min_y = pulse_coordinates.origin
+        width = pulse_coordinates.width
+        for index, mask in enumerate(masks):
+            if mask:
+                for facing in facing_strings[mask]:
+                    world.pulse_list.append(index % width + min_x, index // width + min_y, facing)
+        states = iter(states)
+        for block in world.block_coordinates.values():
+            block_type = type(block)
+            if block_type == SInput:
+                block.state, block.seq_index, block.seq_count = next(states)
+            elif block_type in (SRedirector, SSplitter, SOutput):
+                block.state = next(states)
+        world.cycle_count = cycle
+        if random_state is not None:
+            setstate(random_state)
+    
+    def seek(self, cycle):
+        """
+        Goes to any cycle and returns the output states: forwards by stepping, backwards by restoring the last
+        checkpoint at or before it (see keep_checkpoints()), or resetting if there is none, and stepping from there.
+        """
+        if cycle < 0:
+            raise ValueError("Cycles start at 0.")
+        index = None if self.checkpoints is None else self.checkpoints.last_at(cycle)
+        if cycle < self.cycle or (index is not None and self.checkpoints.cycles[index] > self.cycle):
+            if index is None:
+                self.reset()
+            else:
+                self.restore(next(self.checkpoints.snapshots(index)))
+        while self.cycle < cycle:
+            self.step()
+        return self.outputs()
+    
+    def reset(self):
+        world = self.world
+        world.cycle_count = 0
+        world.pulse_list.clear()
+        world.pulse_coordinates.clear()
+        for block in world.block_coordinates.values():
+            if type(block) == SInput:
+                block.seq_index = 0
+                block.seq_count = 0
+                block.state = block.original_state
+            elif type(block) in (SRedirector, SSplitter, SOutput):
+                block.state = False
+        if self.checkpoints is not None and not self.is_deterministic():  # random inputs start a new history
+            self.keep_checkpoints(self.checkpoints.interval, self.checkpoints.budget)
+
+
+class StandaloneSimulation(Simulation):
+    """
+    Base of the other backends (idealaser_bits.py, idealaser_np.py, ...), which read the blocks once and keep their own
+    state instead of stepping a World. They cannot follow edits (edit() raises TypeError): after editing the blocks,
+    create a new simulation. They keep no checkpoints either (keep_checkpoints(), snapshot() and restore() raise
+    TypeError), so seek() to an earlier cycle resets and steps from cycle 0.
+    """
+    def edit(self, coordinates):
+        raise TypeError(f"{type(self).__name__} cannot be edited; create a new one after editing the blocks.")
+    
+    def keep_checkpoints(self, interval=100, budget=64):
+        raise TypeError(f"{type(self).__name__} keeps no checkpoints; use Simulation to seek back quickly.")
+    
+    def snapshot(self):
+        raise TypeError(f"{type(self).__name__} has no snapshots; use Simulation for snapshot()/restore().")
+    
+    def restore(self, snapshot):
+        raise TypeError(f"{type(self).__name__} has no snapshots; use Simulation for snapshot()/restore().")
+
+
+def output_states(blocks=None):  # blocks defaults to block_coordinates
+    if blocks is None:
+        blocks = block_coordinates
     output_dict = {}
-    for block in block_coordinates.values():
+    for block in blocks.values():
         if type(block) == SOutput:
             output_dict[block.coordinates] = block.state
-    cycle_count += 1
-    max_x, min_x, max_y, min_y = edge()
-    area_int = (max_x - min_x - 1) * (max_y - min_y - 1)
-    print(f"Area: {area_int}")
-    if output_dict:
-        print(f"Outputs: ", end="")
-        for k, v in output_dict.items():
-            print(f"{k}: {str(v)[0].lower()}; ", end="")
-        print()
-    for row in range(max_y + 1, min_y - 1, -1):
-        for col in range(min_x - 1, max_x + 1):
-            if row == max_y + 1:
-                if col != min_x - 1:
-                    if -1 < col < 10:  # 1-digit column numbers
-                        print(f"{col} ", end='')
-                    elif col > -10 or col < 100:  # 2-digit column numbers
-                        print(f"{col}", end='')
-                    else:  # 3-digit column numbers
-                        print(col, end='')
-                else:
-                    print("  ", end='')
-            elif col == min_x - 1:
-                if -1 < row < 10:  # 1-digit row numbers
-                    print(f"{row} ", end='')
-                elif row > -10 or row < 100:  # 3-digit row numbers
-                    print(f"{row}", end='')
-                else:  # 3-digit row numbers
-                    print(row, end='')
+    return output_dict
+
+
+def cost(blocks=None):  # blocks defaults to block_coordinates
+    if blocks is None:
+        blocks = block_coordinates
+    return sum(block.cost for block in blocks.values())
+
+
+def area(blocks=None):  # of the bounding box of the blocks; blocks defaults to block_coordinates
+    max_x, min_x, max_y, min_y = edge(blocks)
+    return (max_x - min_x - 1) * (max_y - min_y - 1)
+
+
+def add_block(words, world=None):
+    """
+    Places the block of a main menu command split into words (e.g. ['g', '1', '2', 'd'], see 'help1') in world
+    (default_world by default), and returns it. Raises ValueError with a message for the player if the command is not
+    a valid block, and IndexError if arguments are missing.
+    """
+    blocks = (default_world if world is None else world).block_coordinates
+    try:
+        block_id, coordinates = words[0], (int(words[1]), int(words[2]))
+        seq_temp = [int(i) for i in words[5:] if int(i) >= 0] if block_id == 'i' else []
+    except ValueError:
+        raise ValueError("Please enter valid values.") from None
+    if coordinates in blocks:
+        raise ValueError("Coordinates already occupied by block.")
+    if block_id in ('g', 'r', 'i') and words[3] not in ('w', 'a', 's', 'd'):
+        raise ValueError("Invalid direction provided.")
+    if block_id == 'g':
+        return SGenerator(*coordinates, words[3], world)
+    elif block_id == 'r':
+        return SRedirector(*coordinates, words[3], world)
+    elif block_id == 'p':
+        return SSplitter(*coordinates, world)
+    elif block_id == 'l':
+        return SBlocker(*coordinates, world)
+    elif block_id == 'b':
+        return SBridge(*coordinates, world)
+    elif block_id == 'i':
+        return SInput(*coordinates, words[3], words[4], seq_temp, world)
+    elif block_id == 'o':
+        return SOutput(*coordinates, world)
+    raise ValueError("Unrecognised command.")
+
+
+def block_layout(blocks=None):  # the blocks as a Layout (see idealaser_layout.py); blocks defaults to block_coordinates
+    # raises ValueError (see check_record() in idealaser_layout.py) for blocks a layout cannot store
+    if blocks is None:
+        blocks = block_coordinates
+    records = []
+    for (x, y), block in blocks.items():
+        if type(block) == SInput:
+            records.append(('i', x, y, block.facing, block.original_state, block.seq))
+        else:
+            records.append((block_class_ids[type(block)], x, y, getattr(block, 'facing', None), False, ()))
+    return Layout.from_records(records)
+
+
+def place_layout(layout, world=None):
+    # places the blocks of a Layout in world (default_world by default), which should be empty, and returns its blocks
+    blocks = (default_world if world is None else world).block_coordinates
+    for block_id, x, y, facing, state, seq in layout:
+        if (x, y) in blocks:
+            raise ValueError(f"More than 1 block at {x, y}.")
+        if block_id == 'i':
+            SInput(x, y, facing, 't' if state else 'f', seq, world)
+        elif facing is not None:
+            block_classes[block_id](x, y, facing, world)
+        else:
+            block_classes[block_id](x, y, world)
+    return blocks
+
+
+def glyph_table(block):
+    """
+    The 2 characters tile_print() shows for a block, by block.state (a pair) for inputs, redirectors and splitters, or
+    else by the facing mask of the pulses on its tile (16 of them). Built once per block type and facing.
+    """
+    key = type(block), getattr(block, 'facing', None)
+    table = glyph_tables.get(key)
+    if table is None:
+        block_type, facing = key
+        if block_type == SInput:
+            table = 'If', f'I{facing_dict[facing]}'
+        elif block_type == SRedirector:
+            table = f'{facing.upper()}f', f'{facing.upper()}t'
+        elif block_type == SSplitter:
+            table = 'Pf', 'Pt'
+        elif block_type == SGenerator:
+            table = (f'G{facing_dict[facing]}',) * 16
+        elif block_type == SBridge:
+            # by the number of pulses in the vertical (w, s) and horizontal (a, d) tubes: 2 means they collide
+            glyphs = 'Bf B- B~ Bl Bt B+ Bz Bx B#'.split()
+            table = tuple(glyphs[3 * ((mask & 1) + (mask >> 2 & 1)) + (mask >> 1 & 1) + (mask >> 3 & 1)]
+                          for mask in range(16))
+        else:  # outputs and blockers: hit by a single pulse, or by several
+            letter = 'O' if block_type == SOutput else 'L'
+            table = tuple(f'{letter}f' if not mask else f'{letter}t' if len(facing_strings[mask]) == 1 else f'{letter}#'
+                          for mask in range(16))
+        glyph_tables[key] = table
+    return table
+
+
+glyph_tables = {}
+# Tiles without a block, by the facing mask of their pulses
+empty_glyphs = tuple('  ' if not mask else f'{facing_dict[facing_strings[mask]]} ' if len(facing_strings[mask]) == 1
+                     else '# ' for mask in range(16))
+
+
+class TileRenderer:
+    """
+    Draws the board of a World (default_world by default) for tile_print(), building each frame as a list of lines
+    from glyph_table() lookups and writing it in one go. viewport, if set to (min_x, min_y, max_x, max_y), crops the
+    board. When diff is on (by default, if stream is a terminal), frames are drawn in place at the top of the screen,
+    and only the characters which changed since the previous frame are rewritten, with ANSI escape codes.
+    """
+    def __init__(self, world=None, stream=None):
+        self.world = default_world if world is None else world
+        self.stream = stream  # sys.stdout if None
+        self.viewport = None
+        self.diff = None  # None: if stream is a terminal
+        self.previous = None  # lines of the frame on screen, when drawn in place
+    
+    def invalidate(self):  # something else was printed, so the next frame is drawn whole
+        self.previous = None
+    
+    def in_place(self, lines):  # whether draw() would draw lines in place
+        stream = sys.stdout if self.stream is None else self.stream
+        diff = self.diff if self.diff is not None else stream.isatty()
+        return diff and len(lines) + 10 <= get_terminal_size().lines  # room for the prompts, as scrolling would move it
+    
+    def fit_viewport(self):  # sets the viewport to the top left of the board, as much of it as fits in the terminal
+        size = get_terminal_size()
+        _, min_x, max_y, _ = edge(self.world.block_coordinates)
+        rows = max(1, (size.lines - 16) // 2)  # 2 lines per row, with the 5 lines above it and the 10 below kept free
+        columns = max(1, (size.columns - 3) // 3)  # 3 characters per column, after the row numbers
+        self.viewport = min_x, max_y - rows + 1, min_x + columns - 1, max_y
+    
+    def pan(self, dx, dy):  # moves the viewport by (dx, dy) tiles, if there is one
+        if self.viewport is not None:
+            min_x, min_y, max_x, max_y = self.viewport
+            self.viewport = min_x + dx, min_y + dy, max_x + dx, max_y + dy
+    
+    def frame(self):
+        world = self.world
+        blocks = world.block_coordinates
+        grid = world.pulse_coordinates
+        lines = [f"Cost: {cost(blocks)}", f"Cycles: {world.cycle_count}", f"Area: {area(blocks)}"]
+        output_dict = output_states(blocks)
+        max_x, min_x, max_y, min_y = edge(blocks)
+        if output_dict:
+            lines.append(f"Outputs: {''.join(f'{k}: {str(v)[0].lower()}; ' for k, v in output_dict.items())}")
+        if self.viewport is not None:
+            min_x, min_y = max(min_x, self.viewport[0]), max(min_y, self.viewport[1])
+            max_x, max_y = max(min_x, min(max_x, self.viewport[2])), max(min_y, min(max_y, self.viewport[3]))
+        row_blocks = {}  # y: [(offset in the row, block, glyph table)]
+        for (x, y), block in blocks.items():
+            if min_x <= x <= max_x and min_y <= y <= max_y:
+                row_blocks.setdefault(y, []).append((x - min_x, block, glyph_table(block)))
+        width = max_x - min_x + 1
+        grid_x, grid_y = grid.origin
+        start, end = max(min_x, grid_x), min(max_x, grid_x + grid.width - 1)  # columns the pulse grid covers
+        separator = '-- ' * (width + 1)
+        lines.append('|'.join(['  '] + [f'{x} ' if 0 <= x < 10 else f'{x}' for x in range(min_x, max_x + 1)]))
+        for y in range(max_y, min_y - 1, -1):
+            if start <= end and 0 <= y - grid_y < grid.height:
+                base = (y - grid_y) * grid.width - grid_x
+                masks = bytes(start - min_x) + grid.masks[base + start:base + end + 1] + bytes(max_x - end)
             else:
-                if (col, row) in block_coordinates:
-                    block = block_coordinates[(col, row)]
-                    block_type = type(block)
-                    if block_type == SGenerator:
-                        print(f"G{facing_dict[block.facing]}", end='')
-                    elif block_type == SInput:
-                        if block.state:
-                            print(f"I{facing_dict[block.facing]}", end='')
-                        else:
-                            print("If", end='')
-                    elif block_type == SRedirector:
-                        if block.state:
-                            print(f"{block.facing.upper()}t", end='')
-                        else:
-                            print(f"{block.facing.upper()}f", end='')
-                    elif block_type == SSplitter:
-                        if block.state:
-                            print("Pt", end='')
-                        else:
-                            print("Pf", end='')
-                    elif block_type == SOutput:
-                        if (col, row) in pulse_coordinates:
-                            if len(pulse_coordinates[(col, row)]) == 1:
-                                print("Ot", end='')
-                            else:
-                                print("O#", end='')
-                        else:
-                            print("Of", end='')
-                    elif block_type == SBlocker:
-                        if (col, row) in pulse_coordinates:
-                            if len(pulse_coordinates[(col, row)]) == 1:
-                                print("Lt", end='')
-                            else:
-                                print("L#", end='')
-                        else:
-                            print("Lf", end='')
-                    elif block_type == SBridge:
-                        if (col, row) in pulse_coordinates:
-                            direction_list = pulse_coordinates[(col, row)]
-                            vertical = 0  # 0: no pulse, 1: no collision, 2: collision
-                            horizontal = 0  # same
-                            if 'w' in direction_list:
-                                if 's' in direction_list:
-                                    vertical = 2
-                                else:
-                                    vertical = 1
-                            elif 's' in direction_list:
-                                vertical = 1
-                            if 'a' in direction_list:
-                                if 'd' in direction_list:
-                                    horizontal = 2
-                                else:
-                                    horizontal = 1
-                            elif 'd' in direction_list:
-                                horizontal = 1
-                            if vertical == 0:
-                                # Below case will be caught when (col, row) in pulse_coordinates == False, but it is
-                                # included for consistency
-                                # if horizontal == 0:
-                                #     print("Bf", end='')
-                                if horizontal == 1:
-                                    print("B-", end='')
-                                elif horizontal == 2:
-                                    print("B~", end='')
-                            elif vertical == 1:
-                                if horizontal == 0:
-                                    print("Bl", end='')
-                                elif horizontal == 1:
-                                    print("Bt", end='')
-                                elif horizontal == 2:
-                                    print("B+", end='')
-                            elif vertical == 2:
-                                if horizontal == 0:
-                                    print("Bz", end='')
-                                elif horizontal == 1:
-                                    print("Bx", end='')
-                                elif horizontal == 2:
-                                    print("B#", end='')
-                        else:
-                            print("Bf", end='')
-                else:  # no block at coordinates, find pulses at coordinates
-                    if (col, row) in pulse_coordinates:
-                        if len(pulse_coordinates[(col, row)]) == 1:
-                            print(f"{facing_dict[pulse_coordinates[(col, row)][0]]} ", end='')
-                        else:
-                            print("# ", end='')
-                    else:
-                        print("  ", end='')
-            if col != max_x:
-                print("|", end='')
-        if row != min_y:
-            print(f"\n{'-- ' * (max_x - min_x + 2)}")
+                masks = bytes(width)
+            cells = [empty_glyphs[mask] for mask in masks]
+            for offset, block, table in row_blocks.get(y, ()):
+                cells[offset] = table[block.state] if len(table) == 2 else table[masks[offset]]
+            lines.append(separator)
+            lines.append(f"{f'{y} ' if 0 <= y < 10 else y}|{'|'.join(cells)}")
+        return lines
+    
+    def draw(self, lines, keep_cursor=False):
+        # Drawn in place, the cursor is left below the frame for the prompts, or with keep_cursor where it was (for
+        # frames drawn while a prompt waits below them)
+        stream = sys.stdout if self.stream is None else self.stream
+        if not self.in_place(lines):
+            self.previous = None
+            stream.write('\n'.join(lines) + ('\n\n' if keep_cursor else ''))
+            stream.flush()
+            return
+        if self.previous is None or len(self.previous) != len(lines):
+            if keep_cursor:
+                out = ['\x1b[H', '\n'.join(f'{line}\x1b[K' for line in lines)]
+            else:
+                out = ['\x1b[H\x1b[2J', '\n'.join(lines)]
+        else:
+            out = []
+            for row, (old, new) in enumerate(zip(self.previous, lines), 1):
+                if old == new:
+                    continue
+                if len(old) != len(new):
+                    out.append(f'\x1b[{row};1H{new}\x1b[K')
+                    continue
+                column = 0
+                while column < len(new):  # each run of changed characters
+                    if old[column] == new[column]:
+                        column += 1
+                        continue
+                    run_end = column + 1
+                    while run_end < len(new) and old[run_end] != new[run_end]:
+                        run_end += 1
+                    out.append(f'\x1b[{row};{column + 1}H{new[column:run_end]}')
+                    column = run_end
+        if keep_cursor:
+            out = ['\x1b7', *out, '\x1b8']
+        else:
+            out.append(f'\x1b[{len(lines) + 1};1H\x1b[J')  # below the frame, for the prompts
+        stream.write(''.join(out))
+        stream.flush()
+        self.previous = lines
+
+
+class LiveRun:
+    """
+    Watches a Simulation live: one thread steps it as fast as it goes (or speed cycles per second), and another draws
+    the latest state with a TileRenderer fps times per second. Frames the display cannot keep up with are dropped, so
+    drawing never slows the simulation down; the two only share lock for as long as TileRenderer.frame() takes.
+    """
+    def __init__(self, simulation, tile_renderer, fps=10, speed=0):
+        self.simulation = simulation
+        self.renderer = tile_renderer
+        self.fps = fps
+        self.speed = speed  # cycles per second, 0 for as fast as possible
+        self.message = ''  # shown below the frame
+        self.lock = Lock()  # held while stepping, and while reading a frame
+        self.output_lock = Lock()  # held while writing to the terminal
+        self.running = Event()  # set unless paused
+        self.stopping = Event()
+        self.threads = []
+        self.rate = 0  # cycles per second, measured
+    
+    @property
+    def paused(self):
+        return not self.running.is_set()
+    
+    def start(self):
+        self.running.set()
+        self.stopping.clear()
+        self.renderer.invalidate()
+        self.draw(keep_cursor=False)  # the whole screen, before any prompt
+        self.threads = [Thread(target=self.step_loop, daemon=True), Thread(target=self.draw_loop, daemon=True)]
+        for thread in self.threads:
+            thread.start()
+    
+    def stop(self):
+        self.stopping.set()
+        self.running.set()  # wakes the stepping thread if paused
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+    
+    def pause(self):
+        self.running.clear()
+    
+    def resume(self):
+        self.running.set()
+    
+    def step(self):  # a single step, while paused
+        with self.lock:
+            self.simulation.step()
+        self.draw()
+    
+    def step_loop(self):
+        next_time = since = monotonic()
+        count = 0
+        while not self.stopping.is_set():
+            if self.paused:
+                self.rate = count = 0
+                self.running.wait()
+                next_time = since = monotonic()
+                continue
+            with self.lock:
+                self.simulation.step()
+            count += 1
+            now = monotonic()
+            if now - since >= 1:
+                self.rate, count, since = count / (now - since), 0, now
+            if self.speed:
+                next_time = max(next_time + 1 / self.speed, now)  # running late builds up no debt
+                self.stopping.wait(next_time - now)
+            else:
+                next_time = now
+    
+    def draw_loop(self):
+        while not self.stopping.wait(1 / self.fps):
+            self.draw()
+    
+    def draw(self, keep_cursor=True):
+        with self.lock:
+            lines = self.renderer.frame()
+        state = 'paused' if self.paused else f"{self.rate:.0f} cycles/s"
+        lines.append(f"Live: {state}, speed {f'{self.speed}/s' if self.speed else 'max'}. {self.message}")
+        if keep_cursor and not self.renderer.in_place(lines):  # e.g. the terminal shrank: drawn whole, it would scroll
+            return
+        with self.output_lock:
+            self.renderer.draw(lines, keep_cursor)
+    
+    def prompt(self, text):  # input() below the frame, without racing the frames drawn meanwhile
+        with self.output_lock:
+            stream = sys.stdout if self.renderer.stream is None else self.renderer.stream
+            if self.renderer.previous is not None:
+                stream.write(f'\x1b[{len(self.renderer.previous) + 1};1H\x1b[J')
+            stream.write(text)
+            stream.flush()
+        return input()
+
+
+renderer = TileRenderer()  # draws the frames of tile_print()
+
+
+def tile_print():
+    renderer.draw(renderer.frame())
 
 
 def main_menu():
     global block_coordinates
     global pulse_list
     global pulse_coordinates
+    global warm
+    global warm_simulation
+    renderer.invalidate()  # the menu prints below the last frame
     while True:
         try:
             user_input = input('''\n'run': run solution (does not begin stepping, just displays initial state)
@@ -456,33 +1200,16 @@ Enter a block ID with required arguments to add it to solution (see help1), or e
                     else:
                         print("Coordinates already occupied by block.")
                 else:  # no existing block found at coordinates, thus user wants to add a block
-                    # Commands for adding new blocks
-                    if user_input[0] == 'g':
-                        if user_input[3] in ('w', 'a', 's', 'd'):
-                            SGenerator(*user_coordinates, user_input[3])
-                        else:
-                            print("Invalid direction provided.")
-                    elif user_input[0] == 'r':
-                        if user_input[3] in ('w', 'a', 's', 'd'):
-                            SRedirector(*user_coordinates, user_input[3])
-                        else:
-                            print("Invalid direction provided.")
-                    elif user_input[0] == 'p':
-                        SSplitter(*user_coordinates)
-                    elif user_input[0] == 'l':
-                        SBlocker(*user_coordinates)
-                    elif user_input[0] == 'b':
-                        SBridge(*user_coordinates)
-                    elif user_input[0] == 'i':
-                        if user_input[3] in ('w', 'a', 's', 'd'):
-                            seq_temp = [int(i) for i in user_input[5:] if int(i) >= 0]
-                            SInput(*user_coordinates, user_input[3], user_input[4], seq_temp)
-                        else:
-                            print("Invalid direction provided.")
-                    elif user_input[0] == 'o':
-                        SOutput(*user_coordinates)
+                    try:
+                        add_block(user_input)  # Commands for adding new blocks
+                    except ValueError as error:
+                        print(error)
+                if warm_simulation is not None:
+                    if block_coordinates:
+                        warm_simulation.edit(user_coordinates)
                     else:
-                        print("Unrecognised command.")
+                        warm_simulation.reset()
+                        warm_simulation = None
             except IndexError:
                 # Commands not concerning individual blocks
                 if user_input[0] == 'run':
@@ -491,7 +1218,16 @@ Enter a block ID with required arguments to add it to solution (see help1), or e
                     else:
                         print("Must put down at least 1 block before running.")
                 elif user_input[0] == 'clear':
+                    if warm_simulation is not None:
+                        warm_simulation.reset()
+                        warm_simulation = None
                     block_coordinates.clear()
+                elif user_input[0] == 'warm':
+                    warm = not warm
+                    if not warm and warm_simulation is not None:
+                        warm_simulation.reset()
+                        warm_simulation = None
+                    print(f"Warm mode {'on' if warm else 'off'}.")
                 elif user_input[0] == 'show_block':
                     print(block_coordinates.values())
                 elif user_input[0] == 'save':
@@ -504,25 +1240,43 @@ Enter a block ID with required arguments to add it to solution (see help1), or e
                                 break
                         else:
                             flag = False
-                            if path.exists(file_path := f'IDEALaser Saves\\Simultaneous Saves\\{save_name}.pickle'):
+                            if path.exists(file_path := path.join(save_folder, f'{save_name}.ilt')):
                                 if input("File already exists. Overwrite? (y: yes, anything: back): ") == 'y':
                                     flag = True
                             else:
                                 flag = True
                             if flag:
-                                with open(file_path, 'wb') as f:
-                                    dump(block_coordinates, f)
+                                try:
+                                    layout = block_layout()
+                                except ValueError as error:  # e.g. coordinates a layout cannot store
+                                    print(f"Could not save {save_name}: {error}")
+                                else:
+                                    write_layout(file_path, layout)
                 elif user_input[0] == 'load':
                     make_folders()
-                    load_list = listdir('IDEALaser Saves\\Simultaneous Saves')
+                    load_list = [file for file in listdir(save_folder) if file.endswith(save_extensions)]
                     print()
                     for file in load_list:
                         print(file)
                     print()
-                    filename = input("Enter file name (without .pickle), or an invalid name to escape: ") + '.pickle'
-                    if filename in load_list:
-                        with open(f'IDEALaser Saves\\Simultaneous Saves\\{filename}', 'rb') as f:
-                            block_coordinates = load(f)
+                    load_name = input("Enter file name (without extension), or an invalid name to escape: ")
+                    filename = next((load_name + extension for extension in save_extensions
+                                     if load_name + extension in load_list), None)
+                    if filename is not None:
+                        if warm_simulation is not None:
+                            warm_simulation.reset()
+                            warm_simulation = None
+                        file_path = path.join(save_folder, filename)
+                        try:
+                            if filename.endswith('.pickle'):  # old saves; saving again converts them
+                                block_coordinates = load_pickled_blocks(file_path)
+                            else:
+                                layout = read_layout(file_path)
+                                block_coordinates = BlockDict()
+                                place_layout(layout)
+                        except ValueError as error:
+                            block_coordinates = BlockDict()
+                            print(f"Could not load {filename}: {error}")
                 elif user_input[0] == 'q':
                     return 'q'
                 elif user_input[0] == 'help1':
@@ -543,6 +1297,8 @@ Other Commands:
 'show_block': Show block list
 'save': Save current setup (only saves blocks, does not save lasers)
 'load': Load block setup from a save (unsaved setups will be lost)
+'warm': Toggle warm mode: lasers are kept when going back to the main menu, and edits only re-evaluate the tiles
+    around them instead of clearing the lasers
 'q': Quit (usable when running solution) (unsaved setups will be lost)''')
                 else:
                     print("Unrecognised command.")
@@ -551,85 +1307,95 @@ Other Commands:
 
 
 def run_solution():
-    global block_coordinates
-    global pulse_list
-    global pulse_coordinates
-    global cycle_count
+    global warm_simulation
+    simulation = warm_simulation if warm_simulation is not None else Simulation()
+    if simulation.checkpoints is None:
+        simulation.keep_checkpoints()
+    if warm:
+        warm_simulation = simulation
     while True:
         option = input('''\n\n'r': Step
+'seek': Go to any cycle, earlier ones included
+'view': Show only part of the board, which 'w', 'a', 's', 'd' then scroll
+'live': Toggle drawing in place, redrawing only what changed (on by default in a terminal)
+'play': Run in the background and watch it live, with pause, speed and step controls
 'help2': Show symbol meanings in solution
 'show_laser': Show laser list (not usable in main menu)
-'esc': Go back to main menu (clears lasers but does not clear blocks; use 'clear' later): ''')
+'esc': Go back to main menu (clears lasers unless in warm mode, does not clear blocks; use 'clear' later): ''')
         if option == 'r':
-            # Step 1
-            for block in block_coordinates.values():
-                block.prestep()  # only Redirectors and Splitters
-            # Step 2
-            new_pulses = []
-            new_pulse_coordinates = {}
-            # Append to new lists pulses that are not colliding
-            max_x, min_x, max_y, min_y = edge()
-            for k, v in pulse_coordinates.items():
-                if k in block_coordinates:  # if no error, means block at coordinate, check if bridge (and related criteria)
-                    block = block_coordinates[k]
-                    if type(block) == SBridge:
-                        if k in new_pulse_coordinates:
-                            npc_has_k = True
-                        else:
-                            npc_has_k = False
-                        if ('w' in v) ^ ('s' in v):  # alternative for XOR is bool() != bool()
-                            for pulse in pulse_list:
-                                if pulse.coordinates == k and pulse.facing in ('w', 's'):
-                                    new_pulses.append(pulse)
-                                    break
-                            if npc_has_k:
-                                if 'w' in v:
-                                    new_pulse_coordinates[k].append('w')
-                                else:
-                                    new_pulse_coordinates[k].append('s')
-                            else:
-                                if 'w' in v:
-                                    new_pulse_coordinates[k] = ['w']
-                                else:
-                                    new_pulse_coordinates[k] = ['s']
-                        if ('a' in v) ^ ('d' in v):
-                            for pulse in pulse_list:
-                                if pulse.coordinates == k and pulse.facing in ('a', 'd'):
-                                    new_pulses.append(pulse)
-                                    break
-                            if npc_has_k:
-                                if 'a' in v:
-                                    new_pulse_coordinates[k].append('a')
-                                else:
-                                    new_pulse_coordinates[k].append('d')
-                            else:
-                                if 'a' in v:
-                                    new_pulse_coordinates[k] = ['a']
-                                else:
-                                    new_pulse_coordinates[k] = ['d']
-                else:  # no block found at coordinates, check if only one pulse and not out of board range
-                    if len(v) == 1 and k[0] in range(min_x + 1, max_x) and k[1] in range(min_y + 1, max_y):
-                        for pulse in pulse_list:
-                            if pulse.coordinates == k:
-                                new_pulses.append(pulse)
-                                break
-                        new_pulse_coordinates[k] = v
-            pulse_list = new_pulses
-            pulse_coordinates = new_pulse_coordinates
-            # Step 3
-            for pulse in pulse_list:
-                pulse.step()
-            # Step 4
-            for block in block_coordinates.values():
-                block.step()  # only redirectors, splitters, generators and inputs
-            # Step 5
-            for block in block_coordinates.values():
-                block.poststep()  # only redirectors, splitters and outputs
-            # Step 6
+            simulation.step()
+            tile_print()  # Step 6
+        elif option == 'seek':
+            try:
+                simulation.seek(int(input("Enter cycle: ")))
+                tile_print()
+            except ValueError:
+                print("Please enter a cycle (0 or more).")
+        elif option == 'view':
+            try:
+                view = [int(i) for i in input("Enter min_x min_y max_x max_y (nothing for the whole board): ").split()]
+                if view and len(view) != 4:
+                    raise ValueError
+                renderer.viewport = tuple(view) or None
+                tile_print()
+            except ValueError:
+                print("Please enter 4 numbers.")
+        elif option in ('w', 'a', 's', 'd'):
+            if renderer.viewport is None:
+                print("Use 'view' first.")
+            else:
+                min_x, min_y, max_x, max_y = renderer.viewport
+                dx, dy = facing_offset_dict[option]
+                renderer.pan(dx * max(1, (max_x - min_x + 1) // 2), dy * max(1, (max_y - min_y + 1) // 2))
+                tile_print()
+        elif option == 'live':
+            stream = sys.stdout if renderer.stream is None else renderer.stream
+            renderer.diff = not (renderer.diff if renderer.diff is not None else stream.isatty())
+            renderer.invalidate()
+            print(f"Drawing in place {'on' if renderer.diff else 'off'}.")
+        elif option == 'play':
+            # frames drawn whole while the prompt waits would scroll it away, so they must fit in place
+            if renderer.viewport is None and renderer.in_place(['']) and not renderer.in_place(renderer.frame() + ['']):
+                renderer.fit_viewport()
+                print("The board does not fit the terminal, so only its top left is shown; use 'view' or 'w', 'a', "
+                      "'s', 'd' after 'esc' to change it.")
+            if not renderer.in_place(renderer.frame() + ['']):
+                renderer.invalidate()
+                print("'play' needs the frame drawn in place: turn 'live' on, or 'view' a part of the board small "
+                      "enough for the terminal.")
+                continue
+            live = LiveRun(simulation, renderer)
+            live.start()
+            while True:
+                command = live.prompt("\n'p': Pause/resume, 'n': Step (when paused), 'speed': Set cycles per second, "
+                                      "'esc': Stop: ")
+                live.message = ''
+                if command == 'p':
+                    if live.paused:
+                        live.resume()
+                    else:
+                        live.pause()
+                elif command == 'n':
+                    if live.paused:
+                        live.step()
+                    else:
+                        live.message = "Pause first ('p')."
+                elif command == 'speed':
+                    try:
+                        live.speed = max(0, int(live.prompt("Enter cycles per second (0: as fast as possible): ")))
+                    except ValueError:
+                        live.message = "Please enter a whole number."
+                elif command == 'esc':
+                    break
+                else:
+                    live.message = "Unrecognised command."
+            live.stop()
             tile_print()
         elif option == 'show_laser':
+            renderer.invalidate()
             print(pulse_list)
         elif option == 'help2':
+            renderer.invalidate()
             print('''
 Each cell is represented by 2 characters. The first character is either a letter representing a block (key under
 'help1', except the redirector, which is represented by 'WASD' showing its direction), or one of these: (^ > v < #), the
@@ -651,14 +1417,8 @@ within.
 
 ''')
         elif option == 'esc':
-            cycle_count = 0
-            pulse_list.clear()
-            pulse_coordinates.clear()
-            for block in block_coordinates.values():
-                if type(block) == SInput:
-                    block.seq_index = 0
-                    block.seq_count = 0
-                    block.state = block.original_state
+            if not warm:
+                simulation.reset()
             return
         elif option == 'q':
             return 'q'
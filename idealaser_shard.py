@@ -0,0 +1,174 @@
+"""
+IDEALaser (Simultaneous Evaluation) sharded backend
+
+Splits the edge() bounding box of one board into stripes of rows, each stepped by its own worker process with the
+bitboard backend (idealaser_bits.py). The usual 5 steps (see idealaser_s.py) only ever look 1 tile away, so a stripe
+can be stepped on its own if it also knows the row on either side of it (its halo):
+
+1. Every worker steps its stripe with both halo rows, plus 1 more row beyond each which stands in for the rest of the
+board. The stripe's own rows come out right; the halo rows do not, as they depend on rows the worker does not have.
+
+2. Each worker writes the pulses of its first and last row into a multiprocessing.shared_memory buffer, waits on a
+barrier for every other worker to do the same, and reads the rows of the stripes next to it into its halo rows. The
+buffer has 2 halves, used on alternate cycles, so one barrier per cycle is enough.
+
+Inputs are stepped by every worker whose window holds them, which gives the same states as they do not depend on
+anything else; inputs with random (0) sequence entries are refused, as the workers would each draw their own.
+"""
+from multiprocessing import Barrier, Pipe, Process
+from multiprocessing.shared_memory import SharedMemory
+from os import cpu_count
+import idealaser_s
+from idealaser_s import SInput, StandaloneSimulation
+from idealaser_bits import BitboardSimulation
+
+
+def run_stripe(connection, barrier, memory, blocks, edges, stripes, index):
+    # Worker process: steps stripe index of stripes ((first row, last row) each) for the commands sent through
+    # connection, until it gets 'stop'
+    max_x, min_x, max_y, min_y = edges
+    first, last = stripes[index]
+    low, high = max(min_y, first - 2), min(max_y, last + 2)
+    simulation = BitboardSimulation({k: block for k, block in blocks.items() if low < k[1] < high},
+                                    (max_x, min_x, high, low))
+    width = simulation.width
+    row_mask = (1 << width) - 1
+    row_bytes = (width + 7) // 8
+    size = 4 * row_bytes  # bytes of one row, all 4 planes
+    
+    def slot(parity, stripe, side):  # offset in memory of the first (side 0) or last (side 1) row of a stripe
+        return ((parity * len(stripes) + stripe) * 2 + side) * size
+    
+    def write(offset, y):
+        shift = (y - low) * width
+        for plane in range(4):
+            memory.buf[offset + plane * row_bytes:offset + (plane + 1) * row_bytes] = \
+                (simulation.planes[plane] >> shift & row_mask).to_bytes(row_bytes, 'little')
+    
+    def read(offset, y):
+        shift = (y - low) * width
+        for plane in range(4):
+            row = int.from_bytes(memory.buf[offset + plane * row_bytes:offset + (plane + 1) * row_bytes], 'little')
+            simulation.planes[plane] = simulation.planes[plane] & ~(row_mask << shift) | row << shift
+    
+    own_shift = (first - low) * width
+    own_mask = ((1 << (width * (last - first + 1))) - 1) << own_shift
+    parity = 0
+    while True:
+        command, argument = connection.recv()
+        if command == 'run':
+            for _ in range(argument):
+                simulation.step()
+                write(slot(parity, index, 0), first)
+                write(slot(parity, index, 1), last)
+                barrier.wait()
+                if index > 0:
+                    read(slot(parity, index - 1, 1), first - 1)
+                if index < len(stripes) - 1:
+                    read(slot(parity, index + 1, 0), last + 1)
+                planes = simulation.planes
+                simulation.occupied = planes[0] | planes[1] | planes[2] | planes[3]
+                parity ^= 1
+            connection.send(None)
+        elif command == 'outputs':
+            connection.send({k: state for k, state in simulation.outputs().items() if first <= k[1] <= last})
+        elif command == 'pulses':
+            connection.send({pulse for pulse in simulation.pulses() if first <= pulse[0][1] <= last})
+        elif command == 'state':
+            connection.send((tuple(plane & own_mask for plane in simulation.planes), *simulation.state_key()[1:]))
+        elif command == 'reset':
+            simulation.reset()
+            parity = 0
+            connection.send(None)
+        else:  # 'stop'
+            memory.close()
+            connection.close()
+            return
+
+
+class ShardedSimulation(StandaloneSimulation):
+    """
+    Drop-in replacement for idealaser_s.Simulation, reading blocks from block_coordinates (or the given dict) and
+    starting from the reset state, stepped by processes worker processes (default: the number of CPUs, at most one
+    per row). Does not change the blocks or the globals of idealaser_s. The workers run until close() is called, or
+    the simulation is used as a context manager:
+        with ShardedSimulation() as simulation:
+            simulation.run(1000)
+    """
+    def __init__(self, blocks=None, processes=None):
+        if blocks is None:
+            blocks = idealaser_s.block_coordinates
+        if any(type(block) == SInput and 0 in block.seq for block in blocks.values()):
+            raise ValueError("Inputs with random (0) sequence entries cannot be split between processes.")
+        edges = max_x, min_x, max_y, min_y = idealaser_s.edge(blocks)
+        rows = max_y - min_y + 1
+        if processes is None:
+            processes = cpu_count() or 1
+        processes = max(1, min(processes, rows))
+        self.stripes = [(min_y + rows * i // processes, min_y + rows * (i + 1) // processes - 1)
+                        for i in range(processes)]
+        self.memory = SharedMemory(create=True, size=2 * processes * 2 * 4 * ((max_x - min_x + 1 + 7) // 8))
+        self.barrier = Barrier(processes)  # kept, as with spawned workers it must outlive their start
+        self.connections = []
+        self.workers = []
+        for i in range(processes):
+            connection, worker_connection = Pipe()
+            worker = Process(target=run_stripe, args=(worker_connection, self.barrier, self.memory, dict(blocks), edges,
+                                                      self.stripes, i), daemon=True)
+            worker.start()
+            self.connections.append(connection)
+            self.workers.append(worker)
+        self.cycle_count = 0
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    @property
+    def cycle(self):
+        return self.cycle_count
+    
+    def ask(self, command, argument=None):  # sends a command to every worker, and returns their answers
+        for connection in self.connections:
+            connection.send((command, argument))
+        return [connection.recv() for connection in self.connections]
+    
+    def close(self):  # stops the workers and frees the shared memory; the simulation cannot be used afterwards
+        if not self.workers:
+            return
+        for connection in self.connections:
+            connection.send(('stop', None))
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
+        self.memory.close()
+        self.memory.unlink()
+    
+    def reset(self):
+        self.ask('reset')
+        self.cycle_count = 0
+    
+    def step(self):
+        self.run(1)
+    
+    def run(self, cycles):
+        self.ask('run', cycles)
+        self.cycle_count += cycles
+        return self.outputs()
+    
+    def outputs(self):
+        outputs = {}
+        for states in self.ask('outputs'):
+            outputs.update(states)
+        return outputs
+    
+    def pulses(self):
+        return set().union(*self.ask('pulses'))
+    
+    def state_key(self):
+        return tuple(self.ask('state'))
+    
+    def is_deterministic(self):
+        return True  # random sequences are refused in __init__
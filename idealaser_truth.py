@@ -0,0 +1,88 @@
+"""
+IDEALaser truth tables
+
+Evaluates a simultaneous evaluation solution for every combination of its input blocks' starting states (t/f), each run
+until it is steady or periodic (Simulation.find_cycle()), and tabulates the state of every output at infinity. The
+combinations are independent, so truth_table() spreads them over a process pool, while truth_table_lanes() steps many of
+them at once in a single process with idealaser_lanes.py.
+
+Example (after building a solution into idealaser_s.block_coordinates):
+    inputs, table = truth_table()
+    for assignment, outputs in table.items():
+        print(dict(zip(inputs, assignment)), outputs)
+"""
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
+from itertools import product
+from os import cpu_count
+import idealaser_s
+from idealaser_s import SInput
+from idealaser_bits import BitboardSimulation
+from idealaser_lanes import LaneSimulation
+
+worker_blocks = None  # the solution being evaluated by this process, see init_worker()
+worker_engine = None
+worker_inputs = None
+
+
+def init_worker(blocks, engine, input_coordinates):
+    global worker_blocks
+    global worker_engine
+    global worker_inputs
+    worker_blocks, worker_engine, worker_inputs = blocks, engine, input_coordinates
+
+
+def evaluate_assignment(assignment, max_cycles=None):
+    # limit_outputs() of the worker's solution with its inputs starting in the given states, None if no cycle is found
+    for coordinates, state in zip(worker_inputs, assignment):
+        worker_blocks[coordinates].original_state = state
+    simulation = worker_engine(worker_blocks)
+    if simulation.find_cycle(max_cycles) is None:
+        return None
+    return simulation.limit_outputs()
+
+
+def truth_table(blocks=None, max_cycles=None, processes=None, engine=BitboardSimulation):
+    """
+    Returns (inputs, table): the input coordinates in sorted order, and a dict mapping each tuple of input starting
+    states (in that order) to the outputs' states at infinity (see Simulation.limit_outputs()), or to None if no cycle
+    was found within max_cycles. blocks defaults to idealaser_s.block_coordinates and is not changed. processes defaults
+    to the number of CPUs; with 1, everything runs in this process. engine is a Simulation class taking a block dict
+    (BitboardSimulation or NumpySimulation).
+    """
+    if blocks is None:
+        blocks = idealaser_s.block_coordinates
+    input_coordinates = sorted(k for k, block in blocks.items() if type(block) == SInput)
+    assignments = list(product((False, True), repeat=len(input_coordinates)))
+    if processes is None:
+        processes = min(cpu_count() or 1, len(assignments))
+    if processes == 1:
+        init_worker(deepcopy(blocks), engine, input_coordinates)
+        results = [evaluate_assignment(assignment, max_cycles) for assignment in assignments]
+    else:
+        with ProcessPoolExecutor(processes, initializer=init_worker,
+                                 initargs=(blocks, engine, input_coordinates)) as pool:
+            results = list(pool.map(evaluate_assignment, assignments, [max_cycles] * len(assignments),
+                                    chunksize=max(1, len(assignments) // (processes * 4))))
+    return input_coordinates, dict(zip(assignments, results))
+
+
+def truth_table_lanes(blocks=None, max_cycles=None, lanes=None):
+    """
+    Same as truth_table(), but runs lanes input combinations (default: all of them) per LaneSimulation, in this process.
+    """
+    if blocks is None:
+        blocks = idealaser_s.block_coordinates
+    input_coordinates = sorted(k for k, block in blocks.items() if type(block) == SInput)
+    assignments = list(product((False, True), repeat=len(input_coordinates)))
+    if lanes is None:
+        lanes = len(assignments)
+    table = {}
+    for start in range(0, len(assignments), lanes):
+        batch = assignments[start:start + lanes]
+        simulation = LaneSimulation(batch, blocks)
+        if simulation.find_cycle(max_cycles) is None:
+            table.update(dict.fromkeys(batch))
+        else:
+            table.update(zip(batch, simulation.limit_outputs()))
+    return input_coordinates, table